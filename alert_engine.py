@@ -0,0 +1,265 @@
+"""
+Price Alert Engine
+
+Alerts are kept in per-(symbol, metric) sorted threshold lists, one list for
+"above" alerts and one for "below" alerts. Evaluating a new snapshot is a
+bisect per list: every "above" alert with threshold <= value and every
+"below" alert with threshold >= value has fired, and nothing else is
+touched. Alerts are one-shot, so fired alerts leave the index.
+
+Fired alerts are delivered by AlertDispatcher, which posts JSON to a
+webhook from a bounded queue on a background thread; when the queue is full
+deliveries are dropped and counted instead of blocking the refresh cycle.
+
+    ALERT_WEBHOOK_URL   webhook that fired alerts are posted to (unset: no delivery)
+    ALERT_QUEUE_SIZE    maximum queued deliveries (default: 10000)
+    ALERT_WEBHOOK_TIMEOUT  seconds per webhook POST (default: 5)
+"""
+
+import os
+import queue
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+import requests
+
+from logging_config import get_logger
+
+log = get_logger('alerts')
+
+ALERT_WEBHOOK_URL = os.environ.get('ALERT_WEBHOOK_URL', '')
+ALERT_QUEUE_SIZE = int(os.environ.get('ALERT_QUEUE_SIZE', 10000))
+ALERT_WEBHOOK_TIMEOUT = float(os.environ.get('ALERT_WEBHOOK_TIMEOUT', 5))
+
+METRICS = ('price', 'change_percent')
+DIRECTIONS = ('above', 'below')
+
+AlertSpec = namedtuple('AlertSpec', 'id user_id symbol metric direction threshold')
+
+_percent_pattern = re.compile(r'\(\s*([+-]?[\d,]*\.?\d+)\s*%\s*\)')
+
+
+def parse_metrics(quote):
+    """Extract numeric price and percent change from a STOCK_DATA entry
+
+    Returns {'price': float, 'change_percent': float}, omitting any value
+    that is missing or unparseable (e.g. 'Error' or 'N/A').
+    """
+    metrics = {}
+    price = quote.get('price')
+    if price:
+        try:
+            metrics['price'] = float(price.replace('$', '').replace(',', ''))
+        except ValueError:
+            pass
+    change = quote.get('change')
+    if change:
+        match = _percent_pattern.search(change)
+        if match:
+            metrics['change_percent'] = float(match.group(1).replace(',', ''))
+    return metrics
+
+
+class _ThresholdList:
+    """Thresholds kept sorted, with alert ids in a parallel list"""
+
+    __slots__ = ('thresholds', 'ids')
+
+    def __init__(self):
+        self.thresholds = []
+        self.ids = []
+
+    def add(self, threshold, alert_id):
+        index = bisect_right(self.thresholds, threshold)
+        self.thresholds.insert(index, threshold)
+        self.ids.insert(index, alert_id)
+
+    def remove(self, threshold, alert_id):
+        start = bisect_left(self.thresholds, threshold)
+        end = bisect_right(self.thresholds, threshold)
+        for index in range(start, end):
+            if self.ids[index] == alert_id:
+                del self.thresholds[index]
+                del self.ids[index]
+                return
+
+    def pop_at_or_below(self, value):
+        """Remove and return ids with threshold <= value ("above" alerts that fired)"""
+        index = bisect_right(self.thresholds, value)
+        fired = self.ids[:index]
+        del self.thresholds[:index]
+        del self.ids[:index]
+        return fired
+
+    def pop_at_or_above(self, value):
+        """Remove and return ids with threshold >= value ("below" alerts that fired)"""
+        index = bisect_left(self.thresholds, value)
+        fired = self.ids[index:]
+        del self.thresholds[index:]
+        del self.ids[index:]
+        return fired
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class AlertIndex:
+    """In-memory index of active alerts, safe to update from request threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.alerts = {}
+        self.above = {}
+        self.below = {}
+        # Last evaluated metrics per symbol, and symbols that must be re-checked
+        # even if unchanged because an alert was added for them
+        self.last_values = {}
+        self.dirty = set()
+        self.loaded = False
+
+    def load(self, specs):
+        """Replace the index contents with `specs`"""
+        with self.lock:
+            self.alerts.clear()
+            self.above.clear()
+            self.below.clear()
+            self.last_values.clear()
+            self.dirty.clear()
+            for spec in specs:
+                self._add(spec)
+            self.loaded = True
+
+    def _add(self, spec):
+        lists = self.above if spec.direction == 'above' else self.below
+        key = (spec.symbol, spec.metric)
+        if key not in lists:
+            lists[key] = _ThresholdList()
+        lists[key].add(spec.threshold, spec.id)
+        self.alerts[spec.id] = spec
+        self.dirty.add(spec.symbol)
+
+    def add(self, spec):
+        with self.lock:
+            if spec.id in self.alerts:
+                self._remove(spec.id)
+            self._add(spec)
+
+    def _remove(self, alert_id):
+        spec = self.alerts.pop(alert_id, None)
+        if spec is None:
+            return
+        lists = self.above if spec.direction == 'above' else self.below
+        thresholds = lists.get((spec.symbol, spec.metric))
+        if thresholds is not None:
+            thresholds.remove(spec.threshold, alert_id)
+            if not thresholds:
+                del lists[(spec.symbol, spec.metric)]
+
+    def remove(self, alert_id):
+        with self.lock:
+            self._remove(alert_id)
+
+    def evaluate(self, snapshot):
+        """Return [(AlertSpec, value)] for alerts fired by `snapshot`
+
+        Only symbols whose metrics changed since the last call (or that got a
+        new alert) are checked. Fired alerts are removed from the index.
+        """
+        fired = []
+        with self.lock:
+            for symbol, quote in snapshot.items():
+                metrics = parse_metrics(quote)
+                if not metrics:
+                    continue
+                if self.last_values.get(symbol) == metrics and symbol not in self.dirty:
+                    continue
+                self.last_values[symbol] = metrics
+                self.dirty.discard(symbol)
+
+                for metric, value in metrics.items():
+                    key = (symbol, metric)
+                    fired_ids = []
+                    above = self.above.get(key)
+                    if above is not None:
+                        fired_ids.extend(above.pop_at_or_below(value))
+                        if not above:
+                            del self.above[key]
+                    below = self.below.get(key)
+                    if below is not None:
+                        fired_ids.extend(below.pop_at_or_above(value))
+                        if not below:
+                            del self.below[key]
+                    for alert_id in fired_ids:
+                        fired.append((self.alerts.pop(alert_id), value))
+        return fired
+
+    def __len__(self):
+        return len(self.alerts)
+
+
+class AlertDispatcher:
+    """Deliver alert payloads to webhooks from a bounded queue"""
+
+    def __init__(self, maxsize=ALERT_QUEUE_SIZE, workers=1, timeout=ALERT_WEBHOOK_TIMEOUT,
+                 url=ALERT_WEBHOOK_URL):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.workers = workers
+        self.timeout = timeout
+        self.url = url
+        self.threads = []
+        self.delivered = 0
+        self.failed = 0
+        self.dropped = 0
+        self.stats_lock = threading.Lock()
+
+    def start(self):
+        if self.threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"alert-dispatcher-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def submit(self, payload):
+        """Queue a delivery; returns False if no webhook is configured or the queue is full"""
+        if not self.url:
+            return False
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except queue.Full:
+            with self.stats_lock:
+                self.dropped += 1
+                dropped = self.dropped
+            # Warn on the first drop and then every 1000th to avoid flooding the log
+            if dropped % 1000 == 1:
+                log.warning(f"Alert queue full, {dropped} deliveries dropped so far",
+                            extra={'ticker': payload.get('symbol')})
+            return False
+
+    def _run(self):
+        session = requests.Session()
+        while True:
+            payload = self.queue.get()
+            if payload is None:
+                break
+            try:
+                response = session.post(self.url, json=payload, timeout=self.timeout)
+                ok = response.status_code < 400
+            except requests.RequestException as e:
+                log.warning(f"Alert webhook failed: {e}", extra={'ticker': payload.get('symbol')})
+                ok = False
+            with self.stats_lock:
+                if ok:
+                    self.delivered += 1
+                else:
+                    self.failed += 1
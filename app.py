@@ -1,16 +1,38 @@
 import os
 import json
+import hashlib
+import logging
+import sqlite3
 import time
 import re
-import requests
+import math
+import functools
 import pytz
 from bs4 import BeautifulSoup
 from datetime import datetime
-from flask import Flask, render_template, jsonify, request, redirect, url_for, flash, session
+from flask import Flask, Response, render_template, jsonify, request, redirect, url_for, flash, session, g
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from flask_bcrypt import Bcrypt
+from markupsafe import Markup
 from apscheduler.schedulers.background import BackgroundScheduler
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from logging_config import get_logger
+from json_responses import json_response, to_columnar
+from password_hashing import PasswordHasher, HashingBusy
+from login_throttle import (SlidingWindowLimiter, LOGIN_MAX_ATTEMPTS_PER_IP,
+                            LOGIN_MAX_ATTEMPTS_PER_USER, LOGIN_WINDOW_SECONDS)
+from alert_engine import AlertIndex, AlertDispatcher, AlertSpec, METRICS, DIRECTIONS
+import cycle_trace
+from cycle_trace import CycleTrace, CycleTraceBuffer
+from profiling import (PROFILE_MAX_SECONDS, ProfilerBusy, capture_profile, collapsed,
+                       finish_call, profile_calls, profiled, sample_stacks, start_call)
+
+# Per-subsystem loggers (levels and sampling are configured via LOG_* env vars)
+config_log = get_logger('config')
+scraper_log = get_logger('scraper')
+scheduler_log = get_logger('scheduler')
+db_log = get_logger('db')
+request_log = get_logger('requests')
 
 # SQLAlchemy compatibility fix for serverless environments
 import sqlalchemy
@@ -29,12 +51,12 @@ app.config['SESSION_COOKIE_HTTPONLY'] = True
 DATABASE_URL = os.environ.get('DATABASE_URL', 'sqlite:///stock_dashboard.db')
 
 # Print raw DATABASE_URL for debugging
-print(f"Raw DATABASE_URL: {DATABASE_URL}")
+config_log.debug(f"Raw DATABASE_URL: {DATABASE_URL}")
 
 # Enable Supabase Direct Connection with pg8000
 SUPABASE_CONNECTION_STRING = os.environ.get('SUPABASE_CONNECTION_STRING', '')
 if SUPABASE_CONNECTION_STRING:
-    print(f"Using custom Supabase connection string")
+    config_log.info("Using custom Supabase connection string")
     DATABASE_URL = SUPABASE_CONNECTION_STRING
     # Make sure we use pg8000 as driver
     if DATABASE_URL.startswith("postgresql://"):
@@ -44,7 +66,7 @@ if SUPABASE_CONNECTION_STRING:
 
 # Fix for full URLs that might be provided by Vercel or Supabase
 elif DATABASE_URL.startswith('http'):
-    print(f"WARNING: Converting http/https URL to SQLAlchemy format: {DATABASE_URL}")
+    config_log.warning(f"Converting http/https URL to SQLAlchemy format: {DATABASE_URL}")
     
     # Supabase specific handling - they provide a connection string in a different format
     if 'supabase.co' in DATABASE_URL:
@@ -56,13 +78,13 @@ elif DATABASE_URL.startswith('http'):
             direct_url = os.environ.get('SUPABASE_DIRECT_URL')
             if direct_url and direct_url.startswith('postgres://'):
                 DATABASE_URL = direct_url.replace('postgres://', 'postgresql+pg8000://')
-                print(f"Using direct Supabase connection string: {DATABASE_URL}")
+                config_log.info(f"Using direct Supabase connection string: {DATABASE_URL}")
             else:
                 # Fall back to SQLite if we can't get a proper connection string
-                print("Supabase URL detected but no direct connection string found. Falling back to SQLite.")
+                config_log.warning("Supabase URL detected but no direct connection string found. Falling back to SQLite.")
                 DATABASE_URL = 'sqlite:///stock_dashboard.db'
         except Exception as e:
-            print(f"Error parsing Supabase URL: {e}")
+            config_log.error(f"Error parsing Supabase URL: {e}")
             DATABASE_URL = 'sqlite:///stock_dashboard.db'
     else:
         # General handling for other HTTP URLs
@@ -80,13 +102,13 @@ elif DATABASE_URL.startswith('http'):
                 db_name = parsed_url.path.lstrip('/') or 'postgres'
                 
                 DATABASE_URL = f"postgresql+pg8000://{username}:{password}@{host}:{port}/{db_name}"
-                print(f"Converted to: {DATABASE_URL}")
+                config_log.info(f"Converted to: {DATABASE_URL}")
             else:
                 # Default to SQLite for unsupported URLs
-                print("Unsupported database URL format, falling back to SQLite")
+                config_log.warning("Unsupported database URL format, falling back to SQLite")
                 DATABASE_URL = 'sqlite:///stock_dashboard.db'
         except Exception as e:
-            print(f"Error parsing database URL: {e}")
+            config_log.error(f"Error parsing database URL: {e}")
             DATABASE_URL = 'sqlite:///stock_dashboard.db'
 
 # Fix for Heroku PostgreSQL URLs
@@ -99,11 +121,11 @@ if DATABASE_URL.startswith("postgresql://"):
 
 # For testing and debugging, we can use SQLite locally
 if os.environ.get('USE_SQLITE', 'False').lower() == 'true' or os.environ.get('VERCEL', '') == '1':
-    print("Forcing SQLite usage based on environment variable or Vercel deployment")
+    config_log.info("Forcing SQLite usage based on environment variable or Vercel deployment")
     DATABASE_URL = 'sqlite:///stock_dashboard.db'
 
 # Print the final DATABASE_URL for debugging
-print(f"Using DATABASE_URL: {DATABASE_URL}")
+config_log.info(f"Using DATABASE_URL: {DATABASE_URL}")
 
 # Configure database engine with options for better reliability in serverless environments
 engine_options = {}
@@ -118,7 +140,36 @@ if 'postgresql' in DATABASE_URL or 'postgres' in DATABASE_URL:
             'application_name': 'stock_dashboard_app'  # Identify app in Supabase logs
         }
     }
-    print(f"Configured PostgreSQL engine options for better serverless reliability")
+    config_log.info("Configured PostgreSQL engine options for better serverless reliability")
+elif DATABASE_URL.startswith('sqlite'):
+    engine_options = {
+        # SQLAlchemy defaults file databases to NullPool (a new connection and new PRAGMAs
+        # per checkout); keep connections for the scheduler and request threads instead
+        'poolclass': sqlalchemy.pool.QueuePool,
+        'pool_size': 5,
+        'max_overflow': 10,
+        'connect_args': {
+            'check_same_thread': False,  # Pooled connections are shared across threads
+            'timeout': 15,               # Wait up to 15 seconds for a write lock
+        }
+    }
+    config_log.info("Configured SQLite engine options for pooled WAL connections")
+
+# SQLite tuning applied to every new connection (see set_sqlite_pragmas)
+SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL').upper()
+SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL').upper()
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+
+@sqlalchemy.event.listens_for(sqlalchemy.engine.Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Enable WAL so readers don't block on writers, with fsync only at checkpoints"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.close()
 
 app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
@@ -133,12 +184,23 @@ login_manager.login_view = 'login'
 # Initialize Bcrypt for password hashing
 bcrypt = Bcrypt(app)
 
+# Request-time hashing runs in a bounded process pool so logins don't hold the GIL;
+# start it now, before the scheduler and request threads (only the logging
+# listener thread is running yet, and the workers never log)
+password_hasher = PasswordHasher(log_rounds=app.config.get('BCRYPT_LOG_ROUNDS', 12))
+password_hasher.start()
+
+# Sliding-window limits on authentication attempts
+auth_ip_limiter = SlidingWindowLimiter(LOGIN_MAX_ATTEMPTS_PER_IP, LOGIN_WINDOW_SECONDS)
+auth_user_limiter = SlidingWindowLimiter(LOGIN_MAX_ATTEMPTS_PER_USER, LOGIN_WINDOW_SECONDS)
+
 # Database models
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     tickers = db.relationship('Ticker', backref='user', lazy=True, cascade="all, delete-orphan")
+    alerts = db.relationship('Alert', backref='user', lazy=True, cascade="all, delete-orphan")
     
     def get_id(self):
         return str(self.id)
@@ -146,13 +208,56 @@ class User(UserMixin, db.Model):
 class Ticker(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     symbol = db.Column(db.String(20), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     
+    # (symbol, user_id) also serves the DISTINCT symbol scan; user_id is indexed for user.tickers
     __table_args__ = (db.UniqueConstraint('symbol', 'user_id', name='unique_user_ticker'),)
 
+class Alert(db.Model):
+    """One-shot price or percent-change alert on one of a user's tickers"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    symbol = db.Column(db.String(20), nullable=False)
+    metric = db.Column(db.String(20), nullable=False)     # 'price' or 'change_percent'
+    direction = db.Column(db.String(10), nullable=False)  # 'above' or 'below'
+    threshold = db.Column(db.Float, nullable=False)
+    active = db.Column(db.Boolean, nullable=False, default=True, index=True)
+    triggered_at = db.Column(db.DateTime, nullable=True)
+    triggered_value = db.Column(db.Float, nullable=True)
+    
+    def to_spec(self):
+        return AlertSpec(self.id, self.user_id, self.symbol, self.metric,
+                         self.direction, self.threshold)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'symbol': self.symbol,
+            'metric': self.metric,
+            'direction': self.direction,
+            'threshold': self.threshold,
+            'active': self.active,
+            'triggered_at': self.triggered_at.strftime("%Y-%m-%d %H:%M:%S") if self.triggered_at else None,
+            'triggered_value': self.triggered_value,
+        }
+
+# Upstream endpoints (overridable so benchmarks can point the scraper at a local simulator)
+ROBINHOOD_API_URL = os.environ.get('ROBINHOOD_API_URL', 'https://api.robinhood.com').rstrip('/')
+ROBINHOOD_WEB_URL = os.environ.get('ROBINHOOD_WEB_URL', 'https://robinhood.com').rstrip('/')
+YAHOO_FINANCE_URL = os.environ.get('YAHOO_FINANCE_URL', 'https://finance.yahoo.com').rstrip('/')
+
 # Global stock data - will be cached, but not stored in the database
 STOCK_DATA = {}
 
+# Bumped whenever STOCK_DATA changes; used to invalidate rendered card fragments
+STOCK_DATA_VERSION = 0
+
+# When each quote in STOCK_DATA was fetched (time.time()), for freshness checks
+QUOTE_FETCHED_AT = {}
+
+# Single-symbol quotes younger than this are served from STOCK_DATA instead of refetched
+QUOTE_MAX_AGE = int(os.environ.get('QUOTE_MAX_AGE', 60))
+
 # Create a lock for thread-safe access to STOCK_DATA
 import threading
 data_lock = threading.Lock()
@@ -161,9 +266,26 @@ data_lock = threading.Lock()
 def load_user(user_id):
     return User.query.get(int(user_id))
 
+def fetch_url(url, ticker, provider, **kwargs):
+    """requests.get wrapper that logs (and, during refresh cycles, traces) each attempt"""
+    start = time.perf_counter()
+    with cycle_trace.attempt(provider):
+        response = cycle_trace.get(url, **kwargs)
+    if scraper_log.isEnabledFor(logging.DEBUG):
+        scraper_log.debug(
+            f"{provider} responded {response.status_code} for {ticker}",
+            extra={
+                'ticker': ticker,
+                'provider': provider,
+                'status_code': response.status_code,
+                'latency_ms': round((time.perf_counter() - start) * 1000, 1),
+            }
+        )
+    return response
+
 def scrape_stock_data(ticker):
     """Scrape stock data from Robinhood for a given ticker"""
-    url = f"https://robinhood.com/us/en/stocks/{ticker}/"
+    url = f"{ROBINHOOD_WEB_URL}/us/en/stocks/{ticker}/"
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -176,23 +298,25 @@ def scrape_stock_data(ticker):
     }
     
     try:
-        print(f"Scraping data for {ticker}...")
+        scraper_log.debug(f"Scraping data for {ticker}...", extra={'ticker': ticker})
         
         # Try a more direct API approach first
-        api_url = f"https://api.robinhood.com/instruments/?symbol={ticker}"
-        response = requests.get(api_url, headers=headers, timeout=10)
+        api_url = f"{ROBINHOOD_API_URL}/instruments/?symbol={ticker}"
+        response = fetch_url(api_url, ticker, 'robinhood_api', headers=headers, timeout=10)
         
         if response.status_code == 200:
-            instrument_data = response.json()
+            with cycle_trace.parsing():
+                instrument_data = response.json()
             if instrument_data.get('results') and len(instrument_data['results']) > 0:
                 instrument_id = instrument_data['results'][0]['id']
                 
                 # Get quote data
-                quote_url = f"https://api.robinhood.com/marketdata/quotes/{instrument_id}/"
-                quote_response = requests.get(quote_url, headers=headers, timeout=10)
+                quote_url = f"{ROBINHOOD_API_URL}/marketdata/quotes/{instrument_id}/"
+                quote_response = fetch_url(quote_url, ticker, 'robinhood_quote', headers=headers, timeout=10)
                 
                 if quote_response.status_code == 200:
-                    quote_data = quote_response.json()
+                    with cycle_trace.parsing():
+                        quote_data = quote_response.json()
                     
                     # Extract price and change
                     price = quote_data.get('last_trade_price', 'N/A')
@@ -221,8 +345,7 @@ def scrape_stock_data(ticker):
                     }
         
         # Fallback to the website scraping approach
-        response = requests.get(url, headers=headers, timeout=15)
-        print(f"Response status code: {response.status_code}")
+        response = fetch_url(url, ticker, 'robinhood_web', headers=headers, timeout=15)
         
         if response.status_code == 200:
             # Try to extract data from the HTML using regex
@@ -233,7 +356,8 @@ def scrape_stock_data(ticker):
                 f.write(html_content)
             
             # Look for price data in JSON embedded in the page
-            json_matches = re.findall(r'{"symbol":"' + ticker + r'".+?"last_trade_price":"([^"]+)"', html_content)
+            with cycle_trace.parsing():
+                json_matches = re.findall(r'{"symbol":"' + ticker + r'".+?"last_trade_price":"([^"]+)"', html_content)
             if json_matches:
                 price = f"${float(json_matches[0]):.2f}"
                 
@@ -267,12 +391,13 @@ def scrape_stock_data(ticker):
                 }
             
             # As a last resort, try to scrape the values from fixed positions in the markup
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Extract any text that might contain a price ($ followed by numbers)
-            all_text = soup.get_text()
-            price_pattern = r'\$\d+\.\d+'
-            price_matches = re.findall(price_pattern, all_text)
+            with cycle_trace.parsing():
+                soup = BeautifulSoup(html_content, 'html.parser')
+                
+                # Extract any text that might contain a price ($ followed by numbers)
+                all_text = soup.get_text()
+                price_pattern = r'\$\d+\.\d+'
+                price_matches = re.findall(price_pattern, all_text)
             
             if price_matches:
                 price = price_matches[0]
@@ -289,14 +414,15 @@ def scrape_stock_data(ticker):
                 }
         
         # If all methods fail, use Yahoo Finance as a fallback
-        yahoo_url = f"https://finance.yahoo.com/quote/{ticker}"
-        yahoo_response = requests.get(yahoo_url, headers=headers, timeout=15)
+        yahoo_url = f"{YAHOO_FINANCE_URL}/quote/{ticker}"
+        yahoo_response = fetch_url(yahoo_url, ticker, 'yahoo', headers=headers, timeout=15)
         
         if yahoo_response.status_code == 200:
-            soup = BeautifulSoup(yahoo_response.text, 'html.parser')
-            price_element = soup.find('fin-streamer', {'data-field': 'regularMarketPrice'})
-            change_element = soup.find('fin-streamer', {'data-field': 'regularMarketChange'})
-            change_percent_element = soup.find('fin-streamer', {'data-field': 'regularMarketChangePercent'})
+            with cycle_trace.parsing():
+                soup = BeautifulSoup(yahoo_response.text, 'html.parser')
+                price_element = soup.find('fin-streamer', {'data-field': 'regularMarketPrice'})
+                change_element = soup.find('fin-streamer', {'data-field': 'regularMarketChange'})
+                change_percent_element = soup.find('fin-streamer', {'data-field': 'regularMarketChangePercent'})
             
             if price_element and change_element and change_percent_element:
                 price = f"${price_element.text}"
@@ -320,7 +446,7 @@ def scrape_stock_data(ticker):
             'last_updated': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
     except Exception as e:
-        print(f"Error scraping {ticker}: {str(e)}")
+        scraper_log.warning(f"Error scraping {ticker}: {str(e)}", extra={'ticker': ticker})
         return {
             'ticker': ticker,
             'price': 'Error',
@@ -329,37 +455,99 @@ def scrape_stock_data(ticker):
             'last_updated': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
 
+# Fetches currently running per ticker, so concurrent callers share one upstream request
+inflight_fetches = {}
+inflight_lock = threading.Lock()
+
+def fetch_quote(ticker):
+    """scrape_stock_data(), joining an identical fetch that is already in flight"""
+    with inflight_lock:
+        future = inflight_fetches.get(ticker)
+        owner = future is None
+        if owner:
+            future = Future()
+            inflight_fetches[ticker] = future
+    
+    if not owner:
+        return future.result()
+    
+    try:
+        data = scrape_stock_data(ticker)
+        future.set_result(data)
+        return data
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with inflight_lock:
+            inflight_fetches.pop(ticker, None)
+
+def is_valid_quote(data):
+    """False for the placeholder entries scrape_stock_data() returns on failure"""
+    return not ('Error' in data.get('price', '') or 'Error' in data.get('market_status', ''))
+
+def store_quote(ticker, data):
+    """Write a single quote through to STOCK_DATA"""
+    global STOCK_DATA, STOCK_DATA_VERSION
+    
+    with data_lock:
+        # Copy on write: snapshots handed out earlier may still be iterated
+        updated = dict(STOCK_DATA)
+        updated[ticker] = data
+        STOCK_DATA = updated
+        QUOTE_FETCHED_AT[ticker] = time.time()
+        STOCK_DATA_VERSION += 1
+
+def get_quote(ticker):
+    """Return a quote for one ticker: from STOCK_DATA if fresh, else fetched and written through"""
+    with data_lock:
+        data = STOCK_DATA.get(ticker)
+        fetched_at = QUOTE_FETCHED_AT.get(ticker, 0)
+    
+    if data and is_valid_quote(data) and time.time() - fetched_at < QUOTE_MAX_AGE:
+        return data
+    
+    data = fetch_quote(ticker)
+    if is_valid_quote(data):
+        store_quote(ticker, data)
+    return data
+
+# Span traces of the most recent refresh cycles, served by /admin/trace
+cycle_traces = CycleTraceBuffer()
+
+def fetch_for_cycle(cycle, ticker):
+    """fetch_quote() for a refresh cycle worker, traced and profiled; returns (data, fetched_at)"""
+    with profiled(), cycle.ticker(ticker):
+        return fetch_quote(ticker), time.time()
+
+@profile_calls
 def update_all_stock_data():
     """Update data for all tickers using parallel processing"""
-    global STOCK_DATA
+    global STOCK_DATA, STOCK_DATA_VERSION, QUOTE_FETCHED_AT
     
-    print(f"Scheduler triggered update at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    scheduler_log.info("Scheduler triggered update")
     
     start_time = time.time()
     new_data = {}
+    fetched_at = {}
+    cycle = CycleTrace()
     
-    # Get all unique tickers across all users
-    all_tickers = set()
-    
-    # Use application context when accessing the database
+    # Get all unique tickers across all users in one query
     with app.app_context():
-        for user in User.query.all():
-            for ticker in user.tickers:
-                all_tickers.add(ticker.symbol)
+        all_tickers = {symbol for (symbol,) in db.session.query(Ticker.symbol).distinct()}
     
     # Use ThreadPoolExecutor to scrape data in parallel
     with ThreadPoolExecutor(max_workers=7) as executor:
         # Submit all jobs
-        future_to_ticker = {executor.submit(scrape_stock_data, ticker): ticker for ticker in all_tickers}
+        future_to_ticker = {executor.submit(fetch_for_cycle, cycle, ticker): ticker for ticker in all_tickers}
         
         # Process results as they complete
         for future in as_completed(future_to_ticker):
             ticker = future_to_ticker[future]
             try:
-                data = future.result()
-                new_data[ticker] = data
+                new_data[ticker], fetched_at[ticker] = future.result()
             except Exception as exc:
-                print(f"Error processing {ticker}: {exc}")
+                scheduler_log.error(f"Error processing {ticker}: {exc}", extra={'ticker': ticker})
                 # Provide fallback data in case of error
                 new_data[ticker] = {
                     'ticker': ticker,
@@ -368,16 +556,90 @@ def update_all_stock_data():
                     'market_status': f'Error: Failed to retrieve data',
                     'last_updated': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 }
+                fetched_at[ticker] = time.time()
     
     # Thread-safe update of the shared data
     with data_lock:
+        # Keep quotes written through during this cycle (e.g. a ticker added
+        # mid-cycle) when they are newer than what the cycle fetched
+        for ticker, written_at in QUOTE_FETCHED_AT.items():
+            if written_at > start_time and written_at > fetched_at.get(ticker, 0) and ticker in STOCK_DATA:
+                new_data[ticker] = STOCK_DATA[ticker]
+                fetched_at[ticker] = written_at
+        
         STOCK_DATA = new_data
+        QUOTE_FETCHED_AT = fetched_at
+        STOCK_DATA_VERSION += 1
+    
+    # Check price alerts against the new snapshot
+    try:
+        with app.app_context():
+            evaluate_alerts(new_data)
+    except Exception as e:
+        scheduler_log.error(f"Error evaluating alerts: {str(e)}")
+    
+    cycle_traces.record(cycle)
     
     end_time = time.time()
     elapsed = end_time - start_time
-    print(f"Updated all stock data at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} (took {elapsed:.2f} seconds)")
+    scheduler_log.info(
+        f"Updated all stock data (took {elapsed:.2f} seconds)",
+        extra={'tickers': len(new_data), 'elapsed': round(elapsed, 3)}
+    )
     return new_data
 
+# Active alerts indexed by symbol and threshold; fired alerts go out through the dispatcher
+alert_index = AlertIndex()
+alert_dispatcher = AlertDispatcher()
+
+def evaluate_alerts(snapshot):
+    """Fire, persist and deliver alerts crossed by a STOCK_DATA snapshot"""
+    if not alert_index.loaded:
+        alert_index.load(alert.to_spec() for alert in Alert.query.filter_by(active=True))
+    
+    fired = alert_index.evaluate(snapshot)
+    if not fired:
+        return []
+    
+    triggered_at = datetime.now()
+    try:
+        # Claim each alert only if it is still active, so an alert already fired by
+        # another process (or deleted meanwhile) is not delivered again
+        claimed = []
+        for spec, value in fired:
+            result = db.session.execute(
+                Alert.__table__.update()
+                .where(Alert.id == spec.id, Alert.active.is_(True))
+                .values(active=False, triggered_at=triggered_at, triggered_value=value)
+            )
+            if result.rowcount:
+                claimed.append((spec, value))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        # The fired specs already left the index but are still active in the
+        # database; reload from the database on the next cycle
+        alert_index.loaded = False
+        raise
+    fired = claimed
+    if not fired:
+        return []
+    
+    for spec, value in fired:
+        alert_dispatcher.submit({
+            'alert_id': spec.id,
+            'user_id': spec.user_id,
+            'symbol': spec.symbol,
+            'metric': spec.metric,
+            'direction': spec.direction,
+            'threshold': spec.threshold,
+            'value': value,
+            'triggered_at': triggered_at.strftime("%Y-%m-%d %H:%M:%S"),
+        })
+    
+    scheduler_log.info(f"Triggered {len(fired)} alerts", extra={'tickers': len({spec.symbol for spec, _ in fired})})
+    return fired
+
 # Initialize scheduler - configure to avoid shutdown issues
 scheduler = BackgroundScheduler(
     timezone=pytz.UTC, 
@@ -388,23 +650,27 @@ scheduler.add_job(update_all_stock_data, 'interval', minutes=1, id='stock_update
 
 # Initialize the database and create a default admin user
 def initialize_database():
-    """Initialize database tables and create default admin user if needed"""
-    print("Initializing database...")
+    """Initialize database tables and create default admin user if needed
+
+    Returns True on success and False if the database could not be set up, so
+    callers can retry later.
+    """
+    db_log.info("Initializing database...")
     
     # Test database connectivity first
     if 'postgresql' in DATABASE_URL or 'postgres' in DATABASE_URL:
         try:
             # Try a simple database connection
-            print("Testing database connectivity...")
+            db_log.info("Testing database connectivity...")
             connection = db.engine.connect()
             connection.execute("SELECT 1")
             connection.close()
-            print("Database connection successful!")
+            db_log.info("Database connection successful!")
         except Exception as e:
-            print(f"ERROR: Database connection failed: {str(e)}")
-            print("This may be due to IP restrictions, network issues, or incorrect credentials.")
-            print("If running on Vercel, make sure Supabase allows connections from Vercel's IP range.")
-            print("Consider using Supabase Connection Pooling or switching to a serverless-friendly database.")
+            db_log.error(f"Database connection failed: {str(e)}")
+            db_log.error("This may be due to IP restrictions, network issues, or incorrect credentials.")
+            db_log.error("If running on Vercel, make sure Supabase allows connections from Vercel's IP range.")
+            db_log.error("Consider using Supabase Connection Pooling or switching to a serverless-friendly database.")
             
             # Don't raise the exception - let the app continue with degraded functionality
             # We'll handle database failures gracefully in the routes
@@ -412,10 +678,15 @@ def initialize_database():
     # Create all tables
     try:
         db.create_all()
-        print("Database tables created successfully")
+        db_log.info("Database tables created successfully")
+        
+        # create_all() skips existing tables, so add indexes introduced since they were created
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=db.engine, checkfirst=True)
     except Exception as e:
-        print(f"ERROR creating database tables: {str(e)}")
-        return
+        db_log.error(f"Error creating database tables: {str(e)}")
+        return False
 
     # Check if any users exist
     try:
@@ -437,34 +708,120 @@ def initialize_database():
                 db.session.add(ticker)
             
             db.session.commit()
-            print("Created default admin user with initial tickers")
+            db_log.info("Created default admin user with initial tickers")
         else:
-            print(f"Database already initialized with {user_count} users")
+            db_log.info(f"Database already initialized with {user_count} users")
     except Exception as e:
-        print(f"ERROR creating default user: {str(e)}")
-        # Continue anyway - the app can still function without default users
+        db_log.error(f"Error creating default user: {str(e)}")
+        # Continue anyway - the app can still function without default users,
+        # but report the failure so the next invocation tries again
+        db.session.rollback()
+        return False
+    
+    return True
 
 # Initialize the scheduler in a safer way
 def start_scheduler():
     try:
         if not scheduler.running:
             scheduler.start()
-            print(f"Background scheduler started at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            print(f"Next update scheduled for {scheduler.get_job('stock_updater').next_run_time}")
+            scheduler_log.info("Background scheduler started")
+            scheduler_log.info(f"Next update scheduled for {scheduler.get_job('stock_updater').next_run_time}")
     except Exception as e:
-        print(f"Error starting scheduler: {str(e)}")
+        scheduler_log.error(f"Error starting scheduler: {str(e)}")
 
-# Run the database initialization first
+# Run the database initialization first; vercel_handler checks the flag so a
+# container doesn't initialize again on its first invocation (unless this failed)
 with app.app_context():
-    initialize_database()
+    app._database_initialized = initialize_database()
 
-# Start the scheduler
+# Start the alert delivery thread and the scheduler
+alert_dispatcher.start()
 start_scheduler()
 
 # Initial data load - only do this with app context after db is initialized
 with app.app_context():
     update_all_stock_data()
 
+# Rendered card fragments for STOCK_DATA_VERSION == CARD_CACHE_VERSION. The markup
+# is identical for every user, so each card is rendered once per data version.
+CARD_CACHE = {}
+CARD_CACHE_VERSION = -1
+card_cache_lock = threading.Lock()
+
+def render_stock_card(ticker, data, version):
+    """Return the cached card markup for a ticker, rendering it on a miss"""
+    global CARD_CACHE_VERSION
+
+    with card_cache_lock:
+        # Only move forward: a request still holding an older snapshot renders
+        # its cards uncached instead of wiping the cache for newer requests
+        if version > CARD_CACHE_VERSION:
+            CARD_CACHE.clear()
+            CARD_CACHE_VERSION = version
+        card = CARD_CACHE.get(ticker) if version == CARD_CACHE_VERSION else None
+    if card is not None:
+        return card
+
+    card = Markup(render_template('_stock_card.html', ticker=ticker, data=data))
+    with card_cache_lock:
+        if CARD_CACHE_VERSION == version:
+            CARD_CACHE[ticker] = card
+    return card
+
+# Content hashes of static assets, computed once per file
+STATIC_FINGERPRINTS = {}
+
+@app.context_processor
+def inject_static_url():
+    def static_url(filename):
+        """url_for('static') with a content hash so the asset can be cached forever"""
+        fingerprint = STATIC_FINGERPRINTS.get(filename)
+        if fingerprint is None:
+            with open(os.path.join(app.static_folder, filename), 'rb') as f:
+                fingerprint = hashlib.md5(f.read()).hexdigest()[:12]
+            STATIC_FINGERPRINTS[filename] = fingerprint
+        return url_for('static', filename=filename, v=fingerprint)
+    return {'static_url': static_url}
+
+@app.after_request
+def cache_fingerprinted_assets(response):
+    # Fingerprinted URLs change whenever the file does, so they never go stale
+    if request.endpoint == 'static' and 'v' in request.args and response.status_code == 200:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+    return response
+
+# Request timing (logged at DEBUG so it costs nothing unless enabled)
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+# Requests are profiled only while an /admin/profile capture is running
+@app.before_request
+def start_request_profile():
+    g.profile_token = start_call()
+
+@app.teardown_request
+def finish_request_profile(exc):
+    finish_call(g.pop('profile_token', None))
+
+@app.after_request
+def log_request(response):
+    if request_log.isEnabledFor(logging.DEBUG) and 'request_start' in g:
+        request_log.debug(
+            f"{request.method} {request.path} {response.status_code}",
+            extra={
+                'method': request.method,
+                'path': request.path,
+                'status_code': response.status_code,
+                'latency_ms': round((time.perf_counter() - g.request_start) * 1000, 1),
+            }
+        )
+    return response
+
 # Routes for authentication
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -472,10 +829,22 @@ def login():
         username = request.form.get('username')
         password = request.form.get('password')
         
+        # Throttle before doing any database or bcrypt work
+        if not auth_ip_limiter.hit(request.remote_addr) or not auth_user_limiter.hit((username or '').lower()):
+            flash('Too many login attempts. Please wait a few minutes and try again.')
+            return render_template('login.html'), 429
+        
         # Find user by username
         user = User.query.filter_by(username=username).first()
         
-        if user and bcrypt.check_password_hash(user.password_hash, password):
+        try:
+            valid = bool(user and password) and password_hasher.check_password_hash(user.password_hash, password)
+        except HashingBusy:
+            flash('The server is busy. Please try again in a moment.')
+            return render_template('login.html'), 503
+        
+        if valid:
+            auth_user_limiter.reset(username.lower())
             login_user(user)
             return redirect(url_for('index'))
         else:
@@ -490,6 +859,10 @@ def register():
         password = request.form.get('password')
         confirm_password = request.form.get('confirm_password')
         
+        if not auth_ip_limiter.hit(request.remote_addr):
+            flash('Too many attempts. Please wait a few minutes and try again.')
+            return render_template('register.html'), 429
+        
         # Basic validation
         if not username or not password:
             flash('Username and password are required')
@@ -506,7 +879,12 @@ def register():
             return render_template('register.html')
         
         # Create new user
-        new_user = User(username=username, password_hash=bcrypt.generate_password_hash(password).decode('utf-8'))
+        try:
+            password_hash = password_hasher.generate_password_hash(password)
+        except HashingBusy:
+            flash('The server is busy. Please try again in a moment.')
+            return render_template('register.html'), 503
+        new_user = User(username=username, password_hash=password_hash)
         db.session.add(new_user)
         db.session.commit()
         
@@ -539,10 +917,15 @@ def index():
     user = current_user
     user_tickers = [ticker.symbol for ticker in user.tickers]
     
-    # Filter stock data for current user's tickers
-    user_stock_data = {ticker: STOCK_DATA.get(ticker, {}) for ticker in user_tickers}
+    # Snapshot the data and its version together so cached cards stay consistent
+    with data_lock:
+        stock_data = STOCK_DATA
+        version = STOCK_DATA_VERSION
     
-    return render_template('index.html', stocks=user_stock_data, username=current_user.username)
+    # Assemble the user's dashboard from the shared per-ticker card fragments
+    cards = [render_stock_card(ticker, stock_data.get(ticker, {}), version) for ticker in user_tickers]
+    
+    return render_template('index.html', cards=cards, username=current_user.username)
 
 # Debug route to provide more detailed information (disable in production)
 @app.route('/debug-info')
@@ -592,6 +975,58 @@ def debug_info():
     
     return jsonify(info)
 
+# Admin-only diagnostics
+ADMIN_USERNAMES = {name.strip() for name in os.environ.get('ADMIN_USERNAMES', 'admin').split(',') if name.strip()}
+
+def admin_required(view):
+    """Like login_required, but also requires a username listed in ADMIN_USERNAMES"""
+    @functools.wraps(view)
+    @login_required
+    def wrapper(*args, **kwargs):
+        if current_user.username not in ADMIN_USERNAMES:
+            return jsonify({'status': 'error', 'message': 'Admin access required'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.route('/admin/profile')
+@admin_required
+def admin_profile():
+    """Profile the running process for ?seconds= (cProfile or stack sampling)"""
+    mode = request.args.get('mode', 'sample')
+    if mode not in ('sample', 'cprofile'):
+        return jsonify({'status': 'error', 'message': 'mode must be sample or cprofile'}), 400
+    try:
+        seconds = float(request.args.get('seconds', 5))
+    except ValueError:
+        seconds = None
+    if seconds is None or not math.isfinite(seconds):
+        return jsonify({'status': 'error', 'message': 'seconds must be a number'}), 400
+    seconds = min(max(seconds, 0.1), PROFILE_MAX_SECONDS)
+    
+    try:
+        if mode == 'sample':
+            counts, samples = sample_stacks(seconds)
+            return Response(collapsed(counts), mimetype='text/plain', headers={'X-Profile-Samples': str(samples)})
+        
+        capture = capture_profile(seconds)
+    except ProfilerBusy:
+        return jsonify({'status': 'error', 'message': 'A profile is already being captured'}), 409
+    
+    headers = {'X-Profile-Calls': str(capture.calls)}
+    if request.args.get('format') == 'text':
+        return Response(capture.to_text(sort=request.args.get('sort', 'cumulative')), mimetype='text/plain', headers=headers)
+    headers['Content-Disposition'] = 'attachment; filename=profile.pstats'
+    return Response(capture.to_pstats(), mimetype='application/octet-stream', headers=headers)
+
+@app.route('/admin/trace')
+@admin_required
+def admin_trace():
+    """Per-ticker span traces of the last refresh cycles, newest first"""
+    limit = request.args.get('limit', type=int)
+    if limit is not None and limit < 0:
+        return jsonify({'status': 'error', 'message': 'limit must be zero or more'}), 400
+    return json_response({'cycles': cycle_traces.to_list(limit)})
+
 # API routes
 @app.route('/api/stocks')
 @login_required
@@ -600,7 +1035,11 @@ def api_stocks():
     user = current_user
     user_tickers = [ticker.symbol for ticker in user.tickers]
     user_stock_data = {ticker: STOCK_DATA.get(ticker, {}) for ticker in user_tickers}
-    return jsonify(user_stock_data)
+    
+    # ?format=compact sends parallel arrays instead of one object per ticker
+    if request.args.get('format') == 'compact':
+        return json_response(to_columnar(user_stock_data))
+    return json_response(user_stock_data)
 
 @app.route('/api/tickers')
 @login_required
@@ -608,7 +1047,7 @@ def api_tickers():
     """Return the list of tickers"""
     user = current_user
     user_tickers = [ticker.symbol for ticker in user.tickers]
-    return jsonify({'tickers': user_tickers})
+    return json_response({'tickers': user_tickers})
 
 @app.route('/api/add_ticker', methods=['POST'])
 @login_required
@@ -626,11 +1065,12 @@ def api_add_ticker():
     if existing_ticker:
         return jsonify({'status': 'error', 'message': f'Ticker {ticker} is already in your list'}), 400
     
-    # First check if we can get valid data for this ticker
-    data = scrape_stock_data(ticker)
+    # First check if we can get valid data for this ticker; a fresh cached quote counts,
+    # and a fetched one is written through so the new card has data right away
+    data = get_quote(ticker)
     
     # Check if the data indicates an error
-    if 'Error' in data.get('price', '') or 'Error' in data.get('market_status', ''):
+    if not is_valid_quote(data):
         return jsonify({
             'status': 'error', 
             'message': f'Unable to get data for ticker {ticker}. Please verify it exists and try again.',
@@ -660,12 +1100,78 @@ def api_remove_ticker():
     if not existing_ticker:
         return jsonify({'status': 'error', 'message': f'Ticker {ticker} is not in your list'}), 404
     
-    # Remove the ticker
+    # Remove the ticker along with the user's alerts on it
+    alerts = Alert.query.filter_by(symbol=ticker, user_id=user.id).all()
+    for alert in alerts:
+        db.session.delete(alert)
     db.session.delete(existing_ticker)
     db.session.commit()
+    for alert in alerts:
+        alert_index.remove(alert.id)
     
     return jsonify({'status': 'success', 'message': f'Removed ticker {ticker}'})
 
+@app.route('/api/alerts')
+@login_required
+def api_alerts():
+    """Return the user's alerts, active and triggered"""
+    alerts = Alert.query.filter_by(user_id=current_user.id).order_by(Alert.id).all()
+    return json_response({'alerts': [alert.to_dict() for alert in alerts]})
+
+@app.route('/api/add_alert', methods=['POST'])
+@login_required
+def api_add_alert():
+    """Create an alert on one of the user's tickers"""
+    user = current_user
+    
+    ticker = request.form.get('ticker', '').strip().upper()
+    metric = request.form.get('metric', 'price').strip()
+    direction = request.form.get('direction', '').strip()
+    
+    if not ticker:
+        return jsonify({'status': 'error', 'message': 'No ticker provided'}), 400
+    if metric not in METRICS:
+        return jsonify({'status': 'error', 'message': f"Metric must be one of: {', '.join(METRICS)}"}), 400
+    if direction not in DIRECTIONS:
+        return jsonify({'status': 'error', 'message': f"Direction must be one of: {', '.join(DIRECTIONS)}"}), 400
+    try:
+        threshold = float(request.form.get('threshold', ''))
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'Threshold must be a number'}), 400
+    if not math.isfinite(threshold):
+        return jsonify({'status': 'error', 'message': 'Threshold must be a finite number'}), 400
+    
+    # Alerts are only evaluated for tickers someone is watching
+    if not Ticker.query.filter_by(symbol=ticker, user_id=user.id).first():
+        return jsonify({'status': 'error', 'message': f'Ticker {ticker} is not in your list'}), 404
+    
+    alert = Alert(user_id=user.id, symbol=ticker, metric=metric, direction=direction,
+                  threshold=threshold)
+    db.session.add(alert)
+    db.session.commit()
+    alert_index.add(alert.to_spec())
+    
+    return jsonify({'status': 'success', 'message': f'Added alert for {ticker}', 'alert': alert.to_dict()})
+
+@app.route('/api/remove_alert', methods=['POST'])
+@login_required
+def api_remove_alert():
+    """Delete one of the user's alerts"""
+    try:
+        alert_id = int(request.form.get('alert_id', ''))
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'No alert provided'}), 400
+    
+    alert = Alert.query.filter_by(id=alert_id, user_id=current_user.id).first()
+    if not alert:
+        return jsonify({'status': 'error', 'message': f'Alert {alert_id} not found'}), 404
+    
+    db.session.delete(alert)
+    db.session.commit()
+    alert_index.remove(alert_id)
+    
+    return jsonify({'status': 'success', 'message': f'Removed alert {alert_id}'})
+
 @app.route('/api/update')
 @login_required
 def api_update():
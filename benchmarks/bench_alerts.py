@@ -0,0 +1,165 @@
+"""
+Alert Engine Benchmark
+
+Evaluates a large set of alerts against a stream of random-walk snapshots in
+STOCK_DATA format, compares the bisect index with a naive scan of every
+alert, and delivers the fired alerts through AlertDispatcher to a local
+webhook sink.
+
+    python benchmarks/bench_alerts.py --alerts 100000 --symbols 1000 --cycles 30
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import Timer, make_symbols, percentile, resource_usage
+from webhook_sink import WebhookSink
+
+from alert_engine import AlertDispatcher, AlertIndex, AlertSpec, parse_metrics
+
+
+def make_alerts(count, prices, rng):
+    """Random not-yet-crossed alerts within 10% of price or 5 points of change"""
+    symbols = list(prices)
+    alerts = []
+    for alert_id in range(1, count + 1):
+        symbol = rng.choice(symbols)
+        direction = rng.choice(('above', 'below'))
+        sign = 1 if direction == 'above' else -1
+        if rng.random() < 0.7:
+            metric = 'price'
+            threshold = round(prices[symbol] * (1 + sign * rng.uniform(0.001, 0.1)), 2)
+        else:
+            metric = 'change_percent'
+            threshold = round(sign * rng.uniform(0.01, 5), 2)
+        alerts.append(AlertSpec(alert_id, alert_id % 5000, symbol, metric, direction, threshold))
+    return alerts
+
+
+def make_snapshot(prices, previous_close):
+    snapshot = {}
+    for symbol, price in prices.items():
+        change = price - previous_close[symbol]
+        percent = change / previous_close[symbol] * 100
+        snapshot[symbol] = {
+            'ticker': symbol,
+            'price': f"${price:.2f}",
+            'change': f"{'+' if change >= 0 else ''}{change:.2f} ({'+' if percent >= 0 else ''}{percent:.2f}%)",
+            'market_status': 'Market Open',
+        }
+    return snapshot
+
+
+def naive_evaluate(alerts, snapshot):
+    """Check every active alert against the snapshot (the baseline)"""
+    fired = []
+    metrics = {symbol: parse_metrics(quote) for symbol, quote in snapshot.items()}
+    for alert_id, spec in list(alerts.items()):
+        value = metrics.get(spec.symbol, {}).get(spec.metric)
+        if value is None:
+            continue
+        if (spec.direction == 'above' and value >= spec.threshold) or \
+                (spec.direction == 'below' and value <= spec.threshold):
+            fired.append(alert_id)
+            del alerts[alert_id]
+    return fired
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark incremental alert evaluation')
+    parser.add_argument('--alerts', type=int, default=100000)
+    parser.add_argument('--symbols', type=int, default=1000)
+    parser.add_argument('--cycles', type=int, default=30)
+    parser.add_argument('--volatility', type=float, default=0.005, help='per-cycle price stddev (fraction)')
+    parser.add_argument('--queue-size', type=int, default=50000, help='dispatcher queue bound')
+    parser.add_argument('--webhook-workers', type=int, default=4)
+    parser.add_argument('--webhook-latency-ms', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    previous_close = {symbol: rng.uniform(5, 500) for symbol in make_symbols(args.symbols, args.seed)}
+    prices = dict(previous_close)
+    alerts = make_alerts(args.alerts, prices, rng)
+
+    index = AlertIndex()
+    with Timer() as build:
+        index.load(alerts)
+    naive_alerts = {spec.id: spec for spec in alerts}
+
+    sink = WebhookSink(latency_ms=args.webhook_latency_ms).start()
+    dispatcher = AlertDispatcher(maxsize=args.queue_size, workers=args.webhook_workers, url=sink.url)
+    dispatcher.start()
+
+    index_ms = []
+    naive_ms = []
+    fired_total = 0
+    cpu_before, _ = resource_usage()
+    for _ in range(args.cycles):
+        for symbol in prices:
+            prices[symbol] *= 1 + rng.gauss(0, args.volatility)
+        snapshot = make_snapshot(prices, previous_close)
+
+        with Timer() as timer:
+            fired = index.evaluate(snapshot)
+        index_ms.append(timer.elapsed * 1000)
+
+        with Timer() as timer:
+            expected = naive_evaluate(naive_alerts, snapshot)
+        naive_ms.append(timer.elapsed * 1000)
+
+        if sorted(spec.id for spec, _ in fired) != sorted(expected):
+            raise SystemExit('Index and naive evaluation disagree')
+
+        for spec, value in fired:
+            dispatcher.submit({'alert_id': spec.id, 'symbol': spec.symbol, 'value': value})
+        fired_total += len(fired)
+    cpu_after, peak_rss_mb = resource_usage()
+
+    with Timer() as drain:
+        deadline = time.time() + 60
+        while dispatcher.delivered + dispatcher.failed < fired_total - dispatcher.dropped and time.time() < deadline:
+            time.sleep(0.01)
+    dispatcher.stop()
+    sink.stop()
+
+    report = {
+        'alerts': args.alerts,
+        'symbols': args.symbols,
+        'cycles': args.cycles,
+        'build_ms': round(build.elapsed * 1000, 1),
+        'index_eval_ms_mean': round(sum(index_ms) / len(index_ms), 2),
+        'index_eval_ms_p99': round(percentile(index_ms, 99), 2),
+        'naive_eval_ms_mean': round(sum(naive_ms) / len(naive_ms), 2),
+        'fired': fired_total,
+        'remaining_active': len(index),
+        'delivered': dispatcher.delivered,
+        'failed': dispatcher.failed,
+        'dropped': dispatcher.dropped,
+        'received_by_sink': len(sink.received),
+        'drain_seconds_after_last_cycle': round(drain.elapsed, 2),
+        'cpu_seconds': round(cpu_after - cpu_before, 2),
+        'peak_rss_mb': round(peak_rss_mb, 1),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.alerts} alerts over {args.symbols} symbols, {args.cycles} cycles (index built in {report['build_ms']}ms)")
+    print(f"Index evaluation: mean {report['index_eval_ms_mean']}ms  p99 {report['index_eval_ms_p99']}ms")
+    print(f"Naive scan:       mean {report['naive_eval_ms_mean']}ms")
+    print(f"Fired {fired_total} ({report['remaining_active']} still active); delivered {dispatcher.delivered}, "
+          f"failed {dispatcher.failed}, dropped {dispatcher.dropped}")
+    print(f"Peak RSS: {report['peak_rss_mb']} MB")
+
+
+if __name__ == '__main__':
+    main()
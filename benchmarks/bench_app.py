@@ -0,0 +1,152 @@
+"""
+Refresh Cycle and Route Benchmark
+
+Drives update_all_stock_data() and the dashboard routes against the local
+upstream simulator and reports cycle time, p50/p99 route latency, CPU time
+and peak RSS. Nothing here touches the real Robinhood or Yahoo endpoints.
+
+Example:
+
+    python benchmarks/bench_app.py --tickers 1000 --users 200 --latency-ms 20
+    python benchmarks/bench_app.py --tickers 10000 --users 500 --cycles 1 --json
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import (Timer, load_app, logged_in_client, make_symbols, percentile,
+                    prepare_environment, resource_usage, seed_watchlists)
+from upstream_stub import UpstreamStub
+
+
+def bench_refresh(app_module, cycles):
+    """Time full refresh cycles over the seeded ticker universe"""
+    timings = []
+    for _ in range(cycles):
+        with Timer() as timer:
+            data = app_module.update_all_stock_data()
+        timings.append(timer.elapsed)
+    errors = sum(1 for quote in data.values() if quote.get('price') == 'Error')
+    return {
+        'cycles': cycles,
+        'tickers': len(data),
+        'errors_last_cycle': errors,
+        'cycle_seconds_min': round(min(timings), 3),
+        'cycle_seconds_max': round(max(timings), 3),
+        'cycle_seconds_mean': round(sum(timings) / len(timings), 3),
+    }
+
+
+def bench_route(app_module, path, user_ids, requests_per_user, concurrency):
+    """Hit `path` as every user in parallel and collect per-request latency"""
+    clients = [logged_in_client(app_module, user_id) for user_id in user_ids]
+
+    def run_user(client):
+        latencies = []
+        sizes = []
+        for _ in range(requests_per_user):
+            with Timer() as timer:
+                response = client.get(path, base_url='https://localhost')
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} returned {response.status_code}")
+            latencies.append(timer.elapsed * 1000)
+            sizes.append(len(response.data))
+        return latencies, sizes
+
+    latencies = []
+    sizes = []
+    with Timer() as total:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for user_latencies, user_sizes in executor.map(run_user, clients):
+                latencies.extend(user_latencies)
+                sizes.extend(user_sizes)
+
+    return {
+        'path': path,
+        'requests': len(latencies),
+        'throughput_rps': round(len(latencies) / total.elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'max_ms': round(max(latencies), 2),
+        'mean_bytes': int(sum(sizes) / len(sizes)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark refresh cycles and dashboard routes offline')
+    parser.add_argument('--tickers', type=int, default=1000, help='size of the ticker universe')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--per-user', type=int, default=20, help='tickers per user watchlist')
+    parser.add_argument('--cycles', type=int, default=3, help='refresh cycles to time')
+    parser.add_argument('--requests', type=int, default=5, help='requests per user per route')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent simulated users')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='simulated upstream latency')
+    parser.add_argument('--jitter-ms', type=float, default=5.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--api-share', type=float, default=0.9,
+                        help='share of symbols served by the JSON API (the rest use the HTML fallback)')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+
+    stub = UpstreamStub(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+        api_share=args.api_share,
+    ).start()
+
+    try:
+        workdir = prepare_environment(stub.url)
+        app_module = load_app()
+
+        symbols = make_symbols(args.tickers)
+        with Timer() as seed_timer:
+            user_ids = seed_watchlists(app_module, args.users, symbols, args.per_user)
+
+        report = {
+            'config': vars(args),
+            'workdir': workdir,
+            'seed_seconds': round(seed_timer.elapsed, 3),
+        }
+
+        cpu_before, _ = resource_usage()
+        report['refresh'] = bench_refresh(app_module, args.cycles)
+        cpu_after, _ = resource_usage()
+        report['refresh']['cpu_seconds_per_cycle'] = round((cpu_after - cpu_before) / args.cycles, 3)
+        report['refresh']['upstream_requests'] = stub.config.request_count
+
+        report['routes'] = []
+        for path in ('/api/stocks', '/'):
+            cpu_before, _ = resource_usage()
+            result = bench_route(app_module, path, user_ids, args.requests, args.concurrency)
+            cpu_after, _ = resource_usage()
+            result['cpu_ms_per_request'] = round((cpu_after - cpu_before) * 1000 / result['requests'], 3)
+            report['routes'].append(result)
+
+        _, report['peak_rss_mb'] = resource_usage()
+    finally:
+        stub.stop()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    refresh = report['refresh']
+    print(f"Universe: {refresh['tickers']} tickers, {args.users} users x {args.per_user} tickers")
+    print(f"Refresh:  mean {refresh['cycle_seconds_mean']}s  min {refresh['cycle_seconds_min']}s  "
+          f"max {refresh['cycle_seconds_max']}s  cpu {refresh['cpu_seconds_per_cycle']}s/cycle  "
+          f"errors {refresh['errors_last_cycle']}")
+    for route in report['routes']:
+        print(f"{route['path']:<12} p50 {route['p50_ms']}ms  p99 {route['p99_ms']}ms  "
+              f"{route['throughput_rps']} req/s  cpu {route['cpu_ms_per_request']}ms/req  "
+              f"{route['mean_bytes']} bytes")
+    print(f"Peak RSS: {report['peak_rss_mb']:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
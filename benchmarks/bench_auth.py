@@ -0,0 +1,136 @@
+"""
+Login Load Benchmark
+
+Measures /api/stocks latency for logged-in users while a burst of logins
+hammers /login, to check that bcrypt work does not starve the polling
+endpoints. Run it once with the hashing pool and once inline to compare:
+
+    python benchmarks/bench_auth.py
+    python benchmarks/bench_auth.py --hash-workers 0
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import (SEED_PASSWORD, Timer, load_app, logged_in_client, make_symbols, percentile,
+                    prepare_environment, seed_watchlists)
+
+
+def poll_stocks(app_module, user_ids, duration, concurrency):
+    """Poll /api/stocks as user_ids for `duration` seconds and return latencies in ms"""
+    stop = threading.Event()
+    latencies = []
+    lock = threading.Lock()
+
+    def run(user_id):
+        client = logged_in_client(app_module, user_id)
+        while not stop.is_set():
+            with Timer() as timer:
+                client.get('/api/stocks', base_url='https://localhost')
+            with lock:
+                latencies.append(timer.elapsed * 1000)
+
+    threads = [threading.Thread(target=run, args=(user_ids[i % len(user_ids)],), daemon=True)
+               for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    stop.wait(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def login_burst(app_module, usernames, concurrency, stop):
+    """Log in repeatedly until `stop` is set; returns status code counts"""
+    statuses = {}
+    lock = threading.Lock()
+
+    def run(index):
+        client = app_module.app.test_client()
+        i = index
+        while not stop.is_set():
+            response = client.post('/login', base_url='https://localhost', data={
+                'username': usernames[i % len(usernames)],
+                'password': SEED_PASSWORD,
+            })
+            with lock:
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            i += concurrency
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for index in range(concurrency):
+            executor.submit(run, index)
+    return statuses
+
+
+def summarize(latencies):
+    return {
+        'requests': len(latencies),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'max_ms': round(max(latencies), 2) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure /api/stocks latency under login load')
+    parser.add_argument('--hash-workers', type=int, default=None,
+                        help='password hashing pool size (0 hashes inline on request threads)')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--pollers', type=int, default=8, help='concurrent /api/stocks pollers')
+    parser.add_argument('--logins', type=int, default=16, help='concurrent login clients')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per phase')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+
+    if args.hash_workers is not None:
+        os.environ['AUTH_HASH_WORKERS'] = str(args.hash_workers)
+    # Throttling would turn most of the burst into cheap 429s; measure raw hashing load
+    os.environ['LOGIN_MAX_ATTEMPTS_PER_IP'] = '1000000000'
+    os.environ['LOGIN_MAX_ATTEMPTS_PER_USER'] = '1000000000'
+
+    prepare_environment()
+    app_module = load_app()
+    user_ids = seed_watchlists(app_module, args.users, make_symbols(200), 20)
+    with app_module.app.app_context():
+        User = app_module.User
+        usernames = [user.username for user in User.query.filter(User.id.in_(user_ids))]
+
+    report = {
+        'hash_workers': app_module.password_hasher.workers if app_module.password_hasher.executor else 0,
+        'idle': summarize(poll_stocks(app_module, user_ids, args.duration, args.pollers)),
+    }
+
+    stop = threading.Event()
+    burst_result = {}
+    burst = threading.Thread(
+        target=lambda: burst_result.update(login_burst(app_module, usernames, args.logins, stop)),
+        daemon=True,
+    )
+    burst.start()
+    report['under_login_load'] = summarize(poll_stocks(app_module, user_ids, args.duration, args.pollers))
+    stop.set()
+    burst.join()
+    report['login_statuses'] = burst_result
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Hash workers: {report['hash_workers']} (0 = inline)")
+    for phase in ('idle', 'under_login_load'):
+        result = report[phase]
+        print(f"{phase:<17} /api/stocks p50 {result['p50_ms']}ms  p99 {result['p99_ms']}ms  "
+              f"max {result['max_ms']}ms  ({result['requests']} requests)")
+    print(f"Login responses: {report['login_statuses']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""
+Watchlist Query Benchmark
+
+Seeds a SQLite database with many users and watchlists, then measures the
+refresh universe scan, per-user ticker lookups with and without the user_id
+index, and reader latency while a writer adds and removes tickers.
+
+    python benchmarks/bench_db.py --users 10000 --per-user 50
+    python benchmarks/bench_db.py --journal-mode DELETE   # compare with rollback journaling
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import Timer, load_app, make_symbols, percentile, prepare_environment, seed_watchlists
+
+
+def time_lookups(app_module, user_ids, samples, rng):
+    """Latency in ms of loading a user's tickers the way user.tickers does"""
+    Ticker = app_module.Ticker
+    latencies = []
+    with app_module.app.app_context():
+        for user_id in rng.sample(user_ids, min(samples, len(user_ids))):
+            with Timer() as timer:
+                Ticker.query.filter_by(user_id=user_id).all()
+            latencies.append(timer.elapsed * 1000)
+    return latencies
+
+
+def summarize(latencies):
+    return {
+        'count': len(latencies),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+    }
+
+
+def bench_universe(app_module):
+    """Old per-user walk (one query per user) versus a single DISTINCT scan"""
+    User, Ticker, db = app_module.User, app_module.Ticker, app_module.db
+    with app_module.app.app_context():
+        with Timer() as per_user:
+            walked = set()
+            for user in User.query.all():
+                for ticker in user.tickers:
+                    walked.add(ticker.symbol)
+        db.session.remove()
+        with Timer() as distinct:
+            scanned = {symbol for (symbol,) in db.session.query(Ticker.symbol).distinct()}
+    assert walked == scanned
+    return {
+        'symbols': len(scanned),
+        'per_user_walk_ms': round(per_user.elapsed * 1000, 1),
+        'distinct_scan_ms': round(distinct.elapsed * 1000, 1),
+    }
+
+
+def bench_mixed(app_module, user_ids, duration, readers, rng):
+    """Reader lookup latency while one writer adds and removes tickers"""
+    Ticker, db = app_module.Ticker, app_module.db
+    stop = threading.Event()
+    reader_latencies = []
+    writes = [0]
+    lock = threading.Lock()
+
+    def reader(seed):
+        local_rng = random.Random(seed)
+        with app_module.app.app_context():
+            while not stop.is_set():
+                user_id = local_rng.choice(user_ids)
+                with Timer() as timer:
+                    Ticker.query.filter_by(user_id=user_id).all()
+                with lock:
+                    reader_latencies.append(timer.elapsed * 1000)
+            db.session.remove()
+
+    def writer():
+        with app_module.app.app_context():
+            while not stop.is_set():
+                user_id = rng.choice(user_ids)
+                symbol = f"W{rng.randint(0, 99999)}"
+                db.session.add(Ticker(symbol=symbol, user_id=user_id))
+                db.session.commit()
+                Ticker.query.filter_by(symbol=symbol, user_id=user_id).delete()
+                db.session.commit()
+                writes[0] += 2
+            db.session.remove()
+
+    threads = [threading.Thread(target=reader, args=(i,), daemon=True) for i in range(readers)]
+    threads.append(threading.Thread(target=writer, daemon=True))
+    for thread in threads:
+        thread.start()
+    stop.wait(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    result = summarize(reader_latencies)
+    result['writes_per_second'] = round(writes[0] / duration, 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark watchlist queries on SQLite')
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--per-user', type=int, default=50)
+    parser.add_argument('--symbols', type=int, default=5000)
+    parser.add_argument('--samples', type=int, default=2000, help='per-user lookups to time')
+    parser.add_argument('--readers', type=int, default=4, help='reader threads in the mixed phase')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds for the mixed phase')
+    parser.add_argument('--journal-mode', default=None, help='override SQLITE_JOURNAL_MODE (e.g. DELETE)')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+
+    if args.journal_mode:
+        os.environ['SQLITE_JOURNAL_MODE'] = args.journal_mode
+    prepare_environment()
+    app_module = load_app()
+    db = app_module.db
+    rng = random.Random(42)
+
+    with Timer() as seed_timer:
+        user_ids = seed_watchlists(app_module, args.users, make_symbols(args.symbols), args.per_user)
+
+    with app_module.app.app_context():
+        journal_mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
+
+    report = {
+        'users': args.users,
+        'per_user': args.per_user,
+        'journal_mode': journal_mode,
+        'seed_seconds': round(seed_timer.elapsed, 2),
+        'universe': bench_universe(app_module),
+        'lookup_indexed': summarize(time_lookups(app_module, user_ids, args.samples, rng)),
+    }
+
+    # Same lookups without the user_id index, for comparison
+    index = next(index for index in app_module.Ticker.__table__.indexes if index.name == 'ix_ticker_user_id')
+    with app_module.app.app_context():
+        index.drop(bind=db.engine)
+        report['lookup_unindexed'] = summarize(time_lookups(app_module, user_ids, args.samples, rng))
+        index.create(bind=db.engine)
+
+    report['mixed'] = bench_mixed(app_module, user_ids, args.duration, args.readers, rng)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    universe = report['universe']
+    print(f"{args.users} users x {args.per_user} tickers, journal_mode={journal_mode} "
+          f"(seeded in {report['seed_seconds']}s)")
+    print(f"Universe scan: per-user walk {universe['per_user_walk_ms']}ms, "
+          f"DISTINCT {universe['distinct_scan_ms']}ms ({universe['symbols']} symbols)")
+    for name in ('lookup_indexed', 'lookup_unindexed'):
+        result = report[name]
+        print(f"{name:<17} p50 {result['p50_ms']}ms  p99 {result['p99_ms']}ms")
+    mixed = report['mixed']
+    print(f"Reads during writes: p50 {mixed['p50_ms']}ms  p99 {mixed['p99_ms']}ms  "
+          f"({mixed['writes_per_second']} writes/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""
+Serverless Handler Harness
+
+Replays the sample events in benchmarks/vercel_events.json through
+vercel_handler.handler() and reports the cold start, per-event latency and
+the adapter's overhead compared with calling the Flask app directly.
+
+The admin watchlist is padded with --watchlist extra tickers so /api/stocks
+is large enough to be compressed. Each event's first response is checked
+against its "expect" entry, and events with an "undo" entry (e.g. adding a
+ticker) are undone after every replay so each replay takes the same path.
+
+    python benchmarks/bench_vercel.py --iterations 200
+"""
+
+import argparse
+import base64
+import copy
+import gzip
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import Timer, make_symbols, percentile, prepare_environment
+from upstream_stub import UpstreamStub
+
+EVENTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'vercel_events.json')
+
+
+def fill_cookie(event, cookie):
+    event = copy.deepcopy(event)
+    headers = event.get('headers', {})
+    if headers.get('cookie') == '{session_cookie}':
+        headers['cookie'] = cookie
+    return event
+
+
+def session_cookie(response):
+    """Extract "name=value" of the session cookie from a handler response"""
+    for value in response.get('multiValueHeaders', {}).get('Set-Cookie', []):
+        if value.startswith('session='):
+            return value.split(';', 1)[0]
+    raise SystemExit('Login event did not return a session cookie')
+
+
+def check_expected(name, response, expect):
+    """Fail if a response doesn't match the event's "expect" entry"""
+    if 'status' in expect and response['statusCode'] != expect['status']:
+        raise SystemExit(f"{name}: expected status {expect['status']}, got {response['statusCode']}: "
+                         f"{decoded_body(response)[:200]!r}")
+    if 'base64' in expect and response['isBase64Encoded'] != expect['base64']:
+        raise SystemExit(f"{name}: expected isBase64Encoded={expect['base64']}")
+
+
+def pad_watchlist(app_module, count):
+    """Give the admin user `count` extra tickers and load quotes for them"""
+    with app_module.app.app_context():
+        admin = app_module.User.query.filter_by(username='admin').first()
+        for symbol in make_symbols(count):
+            app_module.db.session.add(app_module.Ticker(symbol=symbol, user_id=admin.id))
+        app_module.db.session.commit()
+    app_module.update_all_stock_data()
+
+
+def decoded_body(response):
+    body = response['body']
+    if not response.get('isBase64Encoded'):
+        return body.encode('utf-8')
+    body = base64.b64decode(body)
+    if response['headers'].get('Content-Encoding') == 'gzip':
+        body = gzip.decompress(body)
+    return body
+
+
+def direct_call(flask_app, event):
+    """Run the same request through Flask's test client as a baseline"""
+    client = flask_app.test_client()
+    headers = {key: value for key, value in event.get('headers', {}).items() if key != 'host'}
+    body = event.get('body')
+    if body and event.get('isBase64Encoded'):
+        body = base64.b64decode(body)
+    return client.open(
+        event['path'], method=event['httpMethod'], base_url='https://localhost',
+        query_string=event.get('queryStringParameters'), headers=headers, data=body,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay sample events through the serverless handler')
+    parser.add_argument('--iterations', type=int, default=100, help='replays per event')
+    parser.add_argument('--watchlist', type=int, default=40, help='extra tickers on the admin watchlist')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+
+    with open(EVENTS_FILE) as f:
+        samples = json.load(f)
+
+    stub = UpstreamStub().start()
+    os.environ['DEFAULT_ADMIN_PASSWORD'] = 'admin'
+    os.environ['LOGIN_MAX_ATTEMPTS_PER_IP'] = '1000000000'
+    os.environ['LOGIN_MAX_ATTEMPTS_PER_USER'] = '1000000000'
+    prepare_environment(stub.url)
+
+    try:
+        # Cold start: module import (which builds the app) plus the first invocation
+        with Timer() as import_timer:
+            import vercel_handler
+            import app as app_module
+        if app_module.scheduler.running:
+            app_module.scheduler.shutdown(wait=False)
+        with Timer() as first_timer:
+            first = vercel_handler.handler(samples[0]['event'], None)
+        pad_watchlist(app_module, args.watchlist)
+
+        login = next(sample for sample in samples if sample['name'] == 'login submit')
+        cookie = session_cookie(vercel_handler.handler(login['event'], None))
+
+        report = {
+            'cold_import_ms': round(import_timer.elapsed * 1000, 1),
+            'first_invocation_ms': round(first_timer.elapsed * 1000, 1),
+            'first_status': first['statusCode'],
+            'events': [],
+        }
+
+        for sample in samples:
+            event = fill_cookie(sample['event'], cookie)
+            undo = fill_cookie(sample['undo'], cookie) if 'undo' in sample else None
+            handler_ms = []
+            direct_ms = []
+            first_response = None
+            for _ in range(args.iterations):
+                with Timer() as timer:
+                    response = vercel_handler.handler(event, None)
+                handler_ms.append(timer.elapsed * 1000)
+                if first_response is None:
+                    first_response = response
+                    check_expected(sample['name'], response, sample.get('expect', {}))
+                if undo:
+                    vercel_handler.handler(undo, None)
+                with Timer() as timer:
+                    direct_call(app_module.app, event)
+                direct_ms.append(timer.elapsed * 1000)
+                if undo:
+                    vercel_handler.handler(undo, None)
+
+            report['events'].append({
+                'name': sample['name'],
+                'status': first_response['statusCode'],
+                'base64': first_response['isBase64Encoded'],
+                'body_bytes': len(decoded_body(first_response)),
+                'handler_p50_ms': round(percentile(handler_ms, 50), 3),
+                'handler_p99_ms': round(percentile(handler_ms, 99), 3),
+                'direct_p50_ms': round(percentile(direct_ms, 50), 3),
+                'overhead_p50_ms': round(percentile(handler_ms, 50) - percentile(direct_ms, 50), 3),
+            })
+    finally:
+        stub.stop()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Cold import {report['cold_import_ms']}ms, first invocation {report['first_invocation_ms']}ms")
+    for result in report['events']:
+        print(f"{result['name']:<26} {result['status']}  handler p50 {result['handler_p50_ms']}ms  "
+              f"p99 {result['handler_p99_ms']}ms  direct p50 {result['direct_p50_ms']}ms  "
+              f"overhead {result['overhead_p50_ms']}ms  {result['body_bytes']} bytes"
+              f"{' (base64)' if result['base64'] else ''}")
+
+
+if __name__ == '__main__':
+    main()
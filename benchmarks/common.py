@@ -0,0 +1,123 @@
+"""
+Shared Benchmark Helpers
+
+Sets up an isolated working directory and SQLite database, points the
+scraper at the local upstream simulator, imports the Flask app and seeds
+synthetic users and watchlists.
+"""
+
+import math
+import os
+import random
+import resource
+import string
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+# A fixed bcrypt hash so seeding thousands of users does not cost a hash each
+SEED_PASSWORD = 'benchmark'
+SEED_PASSWORD_HASH = '$2b$12$nicwSNyn6JvFCPm1ugGB..1Mp/BZ68e3g/QGhd8I4VBTPNfs.WJEu'
+
+
+def prepare_environment(stub_url=None, workdir=None):
+    """Isolate the app in a temp dir with its own database before it is imported"""
+    workdir = workdir or tempfile.mkdtemp(prefix='stocks-bench-')
+    os.chdir(workdir)
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    # Without a stub, point at a closed local port so benchmarks never reach the real upstreams
+    stub_url = stub_url or 'http://127.0.0.1:9'
+    os.environ['ROBINHOOD_API_URL'] = stub_url
+    os.environ['ROBINHOOD_WEB_URL'] = stub_url
+    os.environ['YAHOO_FINANCE_URL'] = stub_url
+    return workdir
+
+
+def load_app():
+    """Import the app module and stop its background scheduler"""
+    import app as app_module
+    if app_module.scheduler.running:
+        app_module.scheduler.shutdown(wait=False)
+    return app_module
+
+
+def make_symbols(count, seed=42):
+    """Generate `count` unique ticker-like symbols"""
+    rng = random.Random(seed)
+    symbols = set()
+    while len(symbols) < count:
+        length = rng.randint(2, 5)
+        symbols.add(''.join(rng.choice(string.ascii_uppercase) for _ in range(length)))
+    return sorted(symbols)
+
+
+def seed_watchlists(app_module, users, symbols, per_user):
+    """Bulk insert `users` users each watching `per_user` symbols
+
+    Symbols are dealt out in order, so every symbol is watched by someone
+    as long as users * per_user >= len(symbols). Returns the new user ids.
+    """
+    User, Ticker, db = app_module.User, app_module.Ticker, app_module.db
+
+    with app_module.app.app_context():
+        start_id = (db.session.query(db.func.max(User.id)).scalar() or 0) + 1
+        user_rows = [
+            {'id': start_id + i, 'username': f"bench_user_{start_id + i}", 'password_hash': SEED_PASSWORD_HASH}
+            for i in range(users)
+        ]
+        db.session.execute(User.__table__.insert(), user_rows)
+
+        ticker_rows = []
+        per_user = min(per_user, len(symbols))
+        for i, row in enumerate(user_rows):
+            offset = i * per_user
+            chosen = {symbols[(offset + k) % len(symbols)] for k in range(per_user)}
+            ticker_rows.extend({'symbol': symbol, 'user_id': row['id']} for symbol in chosen)
+        db.session.execute(Ticker.__table__.insert(), ticker_rows)
+        db.session.commit()
+
+    return [row['id'] for row in user_rows]
+
+
+def logged_in_client(app_module, user_id):
+    """Test client with a Flask-Login session for user_id (skips bcrypt)"""
+    client = app_module.app.test_client()
+    with client.session_transaction(base_url='https://localhost') as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    return client
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def resource_usage():
+    """CPU seconds used so far and peak RSS in MB for this process"""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    peak_rss_mb = usage.ru_maxrss / 1024
+    if sys.platform == 'darwin':
+        peak_rss_mb /= 1024  # macOS reports bytes
+    return usage.ru_utime + usage.ru_stime, peak_rss_mb
+
+
+class Timer:
+    """Context manager measuring wall time in seconds"""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        return False
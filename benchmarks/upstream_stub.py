@@ -0,0 +1,216 @@
+"""
+Local Upstream Simulator
+
+Serves the endpoints that scrape_stock_data() talks to, so refresh cycles can
+be measured without hitting Robinhood or Yahoo:
+
+    /instruments/?symbol=X       Robinhood instruments lookup (JSON)
+    /marketdata/quotes/<id>/     Robinhood quote (JSON)
+    /us/en/stocks/<X>/           Robinhood stock page, replayed from *_debug.html
+    /quote/<X>                   Yahoo Finance quote page (fin-streamer markup)
+
+Latency, error rate and 429 rate are configurable. A share of symbols can be
+forced onto the HTML fallback path by returning an empty instruments result.
+
+Run standalone with:
+
+    python benchmarks/upstream_stub.py --port 8765 --latency-ms 50 --error-rate 0.01
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_debug_pages():
+    """Load the checked-in *_debug.html pages keyed by their ticker"""
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(REPO_ROOT, '*_debug.html'))):
+        ticker = os.path.basename(path).split('_debug.html')[0]
+        with open(path, encoding='utf-8') as f:
+            pages[ticker] = f.read()
+    return pages
+
+
+def synthetic_quote(symbol):
+    """Deterministic but varying price data for a symbol"""
+    seed = int(hashlib.md5(symbol.encode()).hexdigest()[:8], 16)
+    previous_close = 10 + (seed % 50000) / 100
+    # Drift a little every second so consecutive cycles see new prices
+    drift = ((seed + int(time.time())) % 200 - 100) / 1000
+    return {
+        'symbol': symbol,
+        'last_trade_price': f"{previous_close * (1 + drift):.6f}",
+        'previous_close': f"{previous_close:.6f}",
+        'trading_halted': False,
+    }
+
+
+class StubConfig:
+    """Knobs shared by all request handler threads"""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, rate_limit_rate=0.0, api_share=1.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.api_share = api_share
+        self.pages = load_debug_pages()
+        self.page_names = sorted(self.pages)
+        self.request_count = 0
+        self.count_lock = threading.Lock()
+
+    def uses_api(self, symbol):
+        """Whether a symbol is served by the JSON API or falls back to HTML"""
+        bucket = int(hashlib.md5(symbol.encode()).hexdigest()[:4], 16) / 0xFFFF
+        return bucket < self.api_share
+
+    def page_for(self, symbol):
+        """Replay a debug page, rewritten so its embedded JSON matches the symbol"""
+        if symbol in self.pages:
+            return self.pages[symbol]
+        if not self.page_names:
+            return f'<html><body>{symbol} $100.00</body></html>'
+        source = self.page_names[int(hashlib.md5(symbol.encode()).hexdigest()[:8], 16) % len(self.page_names)]
+        return self.pages[source].replace(f'"symbol":"{source}"', f'"symbol":"{symbol}"')
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = 'UpstreamStub/1.0'
+
+    def log_message(self, format, *args):
+        # Keep benchmark output clean
+        pass
+
+    def _send(self, status, body, content_type='application/json'):
+        payload = body.encode('utf-8') if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        config = self.server.config
+        with config.count_lock:
+            config.request_count += 1
+
+        delay = config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        roll = random.random()
+        if roll < config.rate_limit_rate:
+            self._send(429, json.dumps({'detail': 'Request was throttled.'}))
+            return
+        if roll < config.rate_limit_rate + config.error_rate:
+            self._send(500, json.dumps({'detail': 'Internal error.'}))
+            return
+
+        parsed = urlparse(self.path)
+        path = parsed.path
+
+        if path.startswith('/instruments/'):
+            symbol = parse_qs(parsed.query).get('symbol', [''])[0].upper()
+            results = []
+            if symbol and config.uses_api(symbol):
+                results.append({'id': f"stub-{symbol}", 'symbol': symbol})
+            self._send(200, json.dumps({'results': results}))
+            return
+
+        match = re.match(r'^/marketdata/quotes/stub-([^/]+)/$', path)
+        if match:
+            self._send(200, json.dumps(synthetic_quote(match.group(1))))
+            return
+
+        match = re.match(r'^/us/en/stocks/([^/]+)/$', path)
+        if match:
+            self._send(200, config.page_for(match.group(1).upper()), 'text/html; charset=utf-8')
+            return
+
+        match = re.match(r'^/quote/([^/]+)$', path)
+        if match:
+            quote = synthetic_quote(match.group(1).upper())
+            price = float(quote['last_trade_price'])
+            change = price - float(quote['previous_close'])
+            html = (
+                f'<html><body>'
+                f'<fin-streamer data-field="regularMarketPrice">{price:.2f}</fin-streamer>'
+                f'<fin-streamer data-field="regularMarketChange">{change:+.2f}</fin-streamer>'
+                f'<fin-streamer data-field="regularMarketChangePercent">'
+                f'({change / float(quote["previous_close"]) * 100:+.2f}%)</fin-streamer>'
+                f'</body></html>'
+            )
+            self._send(200, html, 'text/html; charset=utf-8')
+            return
+
+        self._send(404, json.dumps({'detail': 'Not found.'}))
+
+
+class UpstreamStub:
+    """Threaded stub server that can be started and stopped from a benchmark"""
+
+    def __init__(self, host='127.0.0.1', port=0, **config):
+        self.server = ThreadingHTTPServer((host, port), StubHandler)
+        self.server.daemon_threads = True
+        self.server.config = StubConfig(**config)
+        self.thread = None
+
+    @property
+    def config(self):
+        return self.server.config
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name='upstream-stub', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve simulated Robinhood/Yahoo endpoints')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--api-share', type=float, default=1.0,
+                        help='share of symbols served by the JSON API (the rest use the HTML fallback)')
+    args = parser.parse_args()
+
+    stub = UpstreamStub(
+        args.host, args.port,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+        api_share=args.api_share,
+    )
+    print(f"Upstream stub listening on {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Local Webhook Stand-in
+
+Accepts alert deliveries (JSON POSTs) and keeps them in memory so alert
+delivery can be exercised without a real webhook receiver. Run standalone
+and point ALERT_WEBHOOK_URL at it:
+
+    python benchmarks/webhook_sink.py --port 8766
+    ALERT_WEBHOOK_URL=http://127.0.0.1:8766/alerts python app.py
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class SinkHandler(BaseHTTPRequestHandler):
+    server_version = 'WebhookSink/1.0'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        sink = self.server.sink
+        if sink.latency_ms:
+            time.sleep(sink.latency_ms / 1000)
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            payload = None
+        sink.record(self.path, payload)
+        if sink.verbose:
+            print(f"{self.path} {json.dumps(payload)}", flush=True)
+        self.send_response(204)
+        self.end_headers()
+
+
+class WebhookSink:
+    """Threaded receiver that records every payload it is sent"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=0.0, verbose=False):
+        self.server = ThreadingHTTPServer((host, port), SinkHandler)
+        self.server.daemon_threads = True
+        self.server.sink = self
+        self.latency_ms = latency_ms
+        self.verbose = verbose
+        self.received = []
+        self.lock = threading.Lock()
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/alerts"
+
+    def record(self, path, payload):
+        with self.lock:
+            self.received.append(payload)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name='webhook-sink', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Receive and print alert webhooks locally')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    args = parser.parse_args()
+
+    sink = WebhookSink(args.host, args.port, latency_ms=args.latency_ms, verbose=True)
+    print(f"Webhook sink listening on {sink.url}")
+    try:
+        sink.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sink.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
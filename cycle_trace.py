@@ -0,0 +1,234 @@
+"""
+Refresh Cycle Tracing
+
+Every refresh cycle records a span per upstream attempt for each ticker it
+fetches: DNS lookup, connect (TCP plus TLS), time to first byte, body
+download and parse time. The last TRACE_CYCLES cycles are kept in a ring
+buffer and served as JSON from /admin/trace, so a slow cycle can be traced
+to the provider, ticker and phase that caused it.
+
+Timings come from a requests transport adapter whose urllib3 connections
+time their own DNS lookup and connect, so no extra requests are made.
+Outside a traced ticker (e.g. ad-hoc fetches from request handlers) get()
+is plain requests.get().
+
+    TRACE_CYCLES   refresh cycles kept in the buffer (default: 20)
+"""
+
+import os
+import socket
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+
+TRACE_CYCLES = int(os.environ.get('TRACE_CYCLES', 20))
+
+# Spans of the ticker being fetched on this thread, and the attempt in progress
+_local = threading.local()
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def current_span():
+    return getattr(_local, 'span', None)
+
+
+class _TimedConnectionMixin:
+    """Records dns_ms and connect_ms on the current span when opening a socket"""
+
+    def _new_conn(self):
+        span = current_span()
+        if span is None:
+            return super()._new_conn()
+
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(self._dns_host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except OSError:
+            # Let urllib3 fail the lookup itself so callers see its usual exception
+            span['dns_ms'] = _ms(time.perf_counter() - start)
+            return super()._new_conn()
+        span['dns_ms'] = _ms(time.perf_counter() - start)
+
+        # Try each resolved address in order, as create_connection() would,
+        # without resolving again. self.host (used for SNI and certificate
+        # checks) reads _dns_host, so it is restored before connect() moves on
+        # to the TLS handshake.
+        dns_host = self._dns_host
+        error = None
+        try:
+            for address in dict.fromkeys(info[4][0] for info in addresses):
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except (NewConnectionError, ConnectTimeoutError) as e:
+                    error = e
+        finally:
+            self._dns_host = dns_host
+        raise error
+
+    def connect(self):
+        span = current_span()
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            if span is not None:
+                span['connect_ms'] = round(_ms(time.perf_counter() - start) - span.get('dns_ms', 0), 2)
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimingAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections record their DNS and connect time"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool,
+        }
+
+
+def get(url, **kwargs):
+    """requests.get() that fills in the current span's timings when tracing"""
+    span = current_span()
+    if span is None:
+        return requests.get(url, **kwargs)
+
+    # A fresh session per call, like requests.get(), so behaviour is unchanged
+    with requests.Session() as session:
+        adapter = TimingAdapter()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        start = time.perf_counter()
+        response = session.get(url, stream=True, **kwargs)
+        headers_at = time.perf_counter()
+        content = response.content
+        done = time.perf_counter()
+
+    span['status_code'] = response.status_code
+    span['ttfb_ms'] = round(_ms(headers_at - start) - span.get('dns_ms', 0) - span.get('connect_ms', 0), 2)
+    span['body_ms'] = _ms(done - headers_at)
+    span['bytes'] = len(content)
+    return response
+
+
+@contextmanager
+def attempt(provider):
+    """Span for one upstream attempt; does nothing unless a ticker is being traced"""
+    spans = getattr(_local, 'spans', None)
+    if spans is None:
+        yield None
+        return
+
+    span = {'provider': provider}
+    spans.append(span)
+    _local.span = span
+    _local.last_span = span
+    start = time.perf_counter()
+    try:
+        yield span
+    except Exception as e:
+        span['error'] = str(e)
+        raise
+    finally:
+        span['total_ms'] = _ms(time.perf_counter() - start)
+        _local.span = None
+
+
+@contextmanager
+def parsing():
+    """Add the time spent in the block to the last attempt's parse_ms"""
+    span = getattr(_local, 'last_span', None)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if span is not None:
+            span['parse_ms'] = round(span.get('parse_ms', 0) + _ms(time.perf_counter() - start), 2)
+
+
+class CycleTrace:
+    """Spans recorded during one refresh cycle, keyed by ticker"""
+
+    def __init__(self):
+        self.started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.start = time.perf_counter()
+        self.elapsed_ms = None
+        self.tickers = {}
+
+    @contextmanager
+    def ticker(self, ticker):
+        """Trace every upstream attempt made on this thread for ticker"""
+        spans = []
+        _local.spans = spans
+        _local.last_span = None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            _local.spans = None
+            _local.last_span = None
+            self.tickers[ticker] = {'elapsed_ms': _ms(time.perf_counter() - start), 'attempts': spans}
+
+    def finish(self):
+        self.elapsed_ms = _ms(time.perf_counter() - self.start)
+
+    def to_dict(self):
+        slowest = sorted(self.tickers, key=lambda ticker: self.tickers[ticker]['elapsed_ms'], reverse=True)
+        return {
+            'started_at': self.started_at,
+            'elapsed_ms': self.elapsed_ms,
+            'ticker_count': len(self.tickers),
+            'slowest': slowest[:10],
+            'tickers': self.tickers,
+        }
+
+
+class CycleTraceBuffer:
+    """Ring buffer of the most recent finished cycles"""
+
+    def __init__(self, max_cycles=TRACE_CYCLES):
+        self.cycles = deque(maxlen=max_cycles)
+        self.lock = threading.Lock()
+
+    def record(self, cycle):
+        cycle.finish()
+        with self.lock:
+            self.cycles.append(cycle)
+
+    def to_list(self, limit=None):
+        """Finished cycles as dicts, newest first"""
+        with self.lock:
+            cycles = list(self.cycles)
+        cycles.reverse()
+        if limit is not None:
+            cycles = cycles[:limit]
+        return [cycle.to_dict() for cycle in cycles]
@@ -0,0 +1,79 @@
+"""
+Compact JSON Responses
+
+Fast JSON serialization for the API routes: orjson when it is installed
+(falling back to the stdlib encoder with compact separators), gzip or brotli
+compression negotiated from Accept-Encoding for bodies above a size
+threshold, and a columnar layout for stock snapshots.
+"""
+
+import gzip
+import json
+import os
+
+from flask import Response, request
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed; compression would not pay off
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Per-ticker fields sent as parallel arrays by to_columnar()
+STOCK_FIELDS = ('price', 'change', 'market_status', 'last_updated')
+
+
+def dumps(payload):
+    """Serialize payload to compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def to_columnar(stock_data):
+    """Convert {ticker: {field: value}} into parallel arrays
+
+    {"tickers": ["AAPL", ...], "price": ["$1.00", ...], ...} drops the
+    per-ticker key repetition. Tickers without data get nulls.
+    """
+    tickers = list(stock_data)
+    columns = {'tickers': tickers}
+    for field in STOCK_FIELDS:
+        columns[field] = [stock_data[ticker].get(field) for ticker in tickers]
+    return columns
+
+
+def _negotiate_encoding():
+    """Pick the best supported content coding the client accepts"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted.quality('br') > 0:
+        return 'br'
+    if accepted.quality('gzip') > 0:
+        return 'gzip'
+    return None
+
+
+def json_response(payload, status=200):
+    """Build a JSON Response, compressed when the client accepts it and it is large"""
+    body = dumps(payload)
+    headers = {'Vary': 'Accept-Encoding'}
+
+    if len(body) >= COMPRESS_MIN_BYTES:
+        encoding = _negotiate_encoding()
+        if encoding == 'br':
+            body = brotli.compress(body, quality=BROTLI_QUALITY)
+            headers['Content-Encoding'] = 'br'
+        elif encoding == 'gzip':
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+            headers['Content-Encoding'] = 'gzip'
+
+    return Response(body, status=status, headers=headers, mimetype='application/json')
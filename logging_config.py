@@ -0,0 +1,173 @@
+"""
+Structured Logging Setup
+
+Routes all application logging through a QueueHandler so scraper threads and
+request handlers never block on stdout or file I/O. A single QueueListener
+thread formats the records (JSON by default) and writes them to stdout and,
+optionally, to a size-rotated log file.
+
+Configuration is done with environment variables:
+
+    LOG_LEVEL           default level for every subsystem (INFO)
+    LOG_LEVELS          per-subsystem levels, e.g. "scraper=WARNING,requests=DEBUG"
+    LOG_SAMPLING        per-subsystem sample rates for records below WARNING,
+                        e.g. "scraper=0.1" keeps roughly 10% of scraper INFO lines
+    LOG_FORMAT          "json" (default) or "text"
+    LOG_FILE            path of a rotated log file (disabled when empty)
+    LOG_FILE_MAX_BYTES  rotate the log file after this many bytes (10 MB)
+    LOG_FILE_BACKUPS    number of rotated files to keep (5)
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime
+
+# All application loggers live under this namespace, e.g. "stocks.scraper"
+ROOT_LOGGER_NAME = 'stocks'
+
+# Extra fields that are copied into the JSON output when set via `extra=`
+STRUCTURED_FIELDS = (
+    'ticker', 'provider', 'status_code', 'latency_ms', 'elapsed',
+    'tickers', 'user_id', 'method', 'path',
+)
+
+_setup_lock = threading.Lock()
+_listener = None
+_queue_handler = None
+
+
+def _parse_mapping(value):
+    """Parse "name=value,name=value" into a dict keyed by full logger name"""
+    mapping = {}
+    for item in value.split(','):
+        if '=' not in item:
+            continue
+        name, setting = item.split('=', 1)
+        name = name.strip()
+        if not name.startswith(ROOT_LOGGER_NAME):
+            name = f"{ROOT_LOGGER_NAME}.{name}"
+        mapping[name] = setting.strip()
+    return mapping
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'msg': record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Drop a share of low-severity records per subsystem
+
+    Records at WARNING and above are always kept so errors are never sampled
+    away. The most specific configured logger prefix wins.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        if not self.rates or record.levelno >= logging.WARNING:
+            return True
+        name = record.name
+        while name:
+            if name in self.rates:
+                return random.random() < self.rates[name]
+            name = name.rpartition('.')[0]
+        return True
+
+
+def setup_logging():
+    """Configure the "stocks" logger tree once per process"""
+    global _listener, _queue_handler
+
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        if os.environ.get('LOG_FORMAT', 'json').lower() == 'text':
+            formatter = logging.Formatter('%(asctime)s %(levelname)s [%(name)s] %(message)s')
+        else:
+            formatter = JsonFormatter()
+
+        handlers = []
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(formatter)
+        handlers.append(stream_handler)
+
+        log_file = os.environ.get('LOG_FILE', '')
+        if log_file:
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file,
+                maxBytes=int(os.environ.get('LOG_FILE_MAX_BYTES', 10 * 1024 * 1024)),
+                backupCount=int(os.environ.get('LOG_FILE_BACKUPS', 5)),
+            )
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+
+        # Unbounded queue: producers only ever do a non-blocking put
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+
+        sample_rates = {}
+        for name, rate in _parse_mapping(os.environ.get('LOG_SAMPLING', '')).items():
+            try:
+                sample_rates[name] = max(0.0, min(1.0, float(rate)))
+            except ValueError:
+                continue
+        if sample_rates:
+            queue_handler.addFilter(SamplingFilter(sample_rates))
+
+        root = logging.getLogger(ROOT_LOGGER_NAME)
+        root.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+        root.addHandler(queue_handler)
+        root.propagate = False
+        _queue_handler = queue_handler
+
+        for name, level in _parse_mapping(os.environ.get('LOG_LEVELS', '')).items():
+            logging.getLogger(name).setLevel(level.upper())
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener, _queue_handler
+
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+        if _queue_handler is not None:
+            logging.getLogger(ROOT_LOGGER_NAME).removeHandler(_queue_handler)
+            _queue_handler = None
+
+
+def get_logger(subsystem):
+    """Return the logger for a subsystem, e.g. get_logger('scraper')"""
+    setup_logging()
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{subsystem}")
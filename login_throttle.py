@@ -0,0 +1,62 @@
+"""
+Login Attempt Throttling
+
+In-memory sliding-window limiter used to cap login and registration
+attempts per client IP and per username, so a burst of guesses cannot queue
+up unbounded bcrypt work. State is per process, which matches how the rest
+of the app keeps its caches.
+
+    LOGIN_MAX_ATTEMPTS_PER_IP    attempts per IP per window (default: 20)
+    LOGIN_MAX_ATTEMPTS_PER_USER  attempts per username per window (default: 5)
+    LOGIN_WINDOW_SECONDS         window length (default: 300)
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+LOGIN_MAX_ATTEMPTS_PER_IP = int(os.environ.get('LOGIN_MAX_ATTEMPTS_PER_IP', 20))
+LOGIN_MAX_ATTEMPTS_PER_USER = int(os.environ.get('LOGIN_MAX_ATTEMPTS_PER_USER', 5))
+LOGIN_WINDOW_SECONDS = float(os.environ.get('LOGIN_WINDOW_SECONDS', 300))
+
+
+class SlidingWindowLimiter:
+    """Allow at most `max_events` per key within the last `window_seconds`"""
+
+    def __init__(self, max_events, window_seconds, max_keys=100000):
+        self.max_events = max_events
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self.events = {}
+        self.lock = threading.Lock()
+
+    def _prune(self, now):
+        """Drop expired keys, then the oldest keys until there is room for one more"""
+        cutoff = now - self.window_seconds
+        for key in [key for key, times in self.events.items() if not times or times[-1] <= cutoff]:
+            del self.events[key]
+        while len(self.events) >= self.max_keys:
+            del self.events[next(iter(self.events))]
+
+    def hit(self, key):
+        """Record an attempt for key; return False if it is over the limit"""
+        now = time.monotonic()
+        cutoff = now - self.window_seconds
+        with self.lock:
+            times = self.events.get(key)
+            if times is None:
+                if len(self.events) >= self.max_keys:
+                    self._prune(now)
+                times = self.events[key] = deque()
+            while times and times[0] <= cutoff:
+                times.popleft()
+            if len(times) >= self.max_events:
+                return False
+            times.append(now)
+            return True
+
+    def reset(self, key):
+        """Forget the attempts for key (e.g. after a successful login)"""
+        with self.lock:
+            self.events.pop(key, None)
@@ -0,0 +1,126 @@
+"""
+Password Hashing Off the Request Threads
+
+bcrypt costs tens to hundreds of milliseconds of CPU per call while holding
+the GIL, so hashing inline on a request thread stalls every other request in
+the process. PasswordHasher runs hashes in a small process pool instead and
+caps how many can be queued at once; callers get HashingBusy rather than an
+ever-growing backlog.
+
+If a process pool cannot be created (e.g. serverless runtimes without
+/dev/shm) or AUTH_HASH_WORKERS=0, hashing runs inline with the same cap.
+
+    AUTH_HASH_WORKERS      pool size (default: min(2, CPU count))
+    AUTH_HASH_MAX_PENDING  hashes allowed in flight or queued (default: 8 per worker)
+    AUTH_HASH_TIMEOUT      seconds a request waits for its hash (default: 10)
+"""
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+
+from logging_config import get_logger
+
+log = get_logger('auth')
+
+AUTH_HASH_WORKERS = int(os.environ.get('AUTH_HASH_WORKERS', min(2, os.cpu_count() or 1)))
+AUTH_HASH_MAX_PENDING = int(os.environ.get('AUTH_HASH_MAX_PENDING', max(1, AUTH_HASH_WORKERS) * 8))
+AUTH_HASH_TIMEOUT = float(os.environ.get('AUTH_HASH_TIMEOUT', 10))
+
+
+class HashingBusy(Exception):
+    """Raised when too many password hashes are already queued"""
+
+
+# These run inside the worker processes, so they only touch the bcrypt module
+def _hash_password(password, log_rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(log_rounds)).decode('utf-8')
+
+
+def _check_password(pw_hash, password):
+    return bcrypt.checkpw(password.encode('utf-8'), pw_hash.encode('utf-8'))
+
+
+def _warm_up():
+    return True
+
+
+class PasswordHasher:
+    """Bounded bcrypt hashing with the same results as Flask-Bcrypt"""
+
+    def __init__(self, workers=AUTH_HASH_WORKERS, max_pending=AUTH_HASH_MAX_PENDING,
+                 timeout=AUTH_HASH_TIMEOUT, log_rounds=12):
+        self.workers = workers
+        self.timeout = timeout
+        self.log_rounds = log_rounds
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.executor = None
+
+    def start(self):
+        """Create and warm the pool
+
+        Call this before the scheduler and request threads start: with the
+        fork start method the workers are forked here, and forking early
+        keeps them from inheriting locks those threads might hold. The
+        logging QueueListener thread is already running at that point; the
+        workers only run bcrypt and never log, so its locks are not touched.
+        """
+        if self.executor is not None or self.workers <= 0:
+            return
+        try:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            self.executor.submit(_warm_up).result(timeout=self.timeout)
+            log.info(f"Password hashing pool started with {self.workers} workers")
+        except Exception as e:
+            log.warning(f"Password hashing pool unavailable, hashing inline: {e}")
+            self.shutdown()
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def _run(self, fn, *args):
+        if not self.slots.acquire(blocking=False):
+            raise HashingBusy()
+
+        executor = self.executor
+        if executor is None:
+            try:
+                return fn(*args)
+            finally:
+                self.slots.release()
+
+        try:
+            future = executor.submit(fn, *args)
+        except (BrokenProcessPool, RuntimeError) as e:
+            self.slots.release()
+            log.error(f"Password hashing pool failed, hashing inline: {e}")
+            if self.executor is executor:
+                self.executor = None
+            return self._run(fn, *args)
+
+        # Free the slot when the work finishes, even if this request gave up waiting
+        future.add_done_callback(lambda _: self.slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            log.warning(f"Password hash took longer than {self.timeout}s")
+            raise HashingBusy()
+        except BrokenProcessPool as e:
+            # A worker died; the slot was freed by the callback above
+            log.error(f"Password hashing pool failed, hashing inline: {e}")
+            if self.executor is executor:
+                self.executor = None
+            return self._run(fn, *args)
+
+    def generate_password_hash(self, password):
+        """Return a bcrypt hash of password as a str"""
+        return self._run(_hash_password, password, self.log_rounds)
+
+    def check_password_hash(self, pw_hash, password):
+        """Return True if password matches pw_hash"""
+        return self._run(_check_password, pw_hash, password)
@@ -0,0 +1,199 @@
+"""
+On-demand Profiling
+
+Two ways to look inside the running process, both served from /admin/profile:
+
+- capture_profile(): cProfile for a fixed window. Before Python 3.12
+  cProfile only sees the thread that enabled it, so app.py wraps its hot
+  paths (request handlers, refresh cycles, per-ticker fetches) in
+  profiled(); while a capture is running each of those calls is profiled on
+  its own thread and merged into the capture when it finishes. Calls still
+  running when the window closes are not included. On 3.12+ cProfile is
+  built on sys.monitoring, which covers every thread and allows only one
+  active profiler, so a single profiler runs for the window and profiled()
+  does nothing.
+- sample_stacks(): samples every thread's stack with sys._current_frames()
+  at a fixed interval and returns collapsed stacks ("frame;frame;frame count"),
+  the input format of flamegraph.pl and speedscope.
+
+Only one capture runs at a time; a second one raises ProfilerBusy.
+
+    PROFILE_MAX_SECONDS          longest capture window allowed (default: 60)
+    PROFILE_SAMPLE_INTERVAL_MS   stack sampling interval (default: 5)
+"""
+
+import cProfile
+import functools
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+PROFILE_MAX_SECONDS = float(os.environ.get('PROFILE_MAX_SECONDS', 60))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.environ.get('PROFILE_SAMPLE_INTERVAL_MS', 5))
+
+# Held for the whole of a capture so only one runs at a time
+_capture_lock = threading.Lock()
+
+# The cProfile capture collecting stats right now, if any
+_active = None
+
+# Set while this thread is already being profiled, so nested hooks do nothing
+_local = threading.local()
+
+# One interpreter-wide profiler instead of one per thread (Python 3.12+)
+PROCESS_WIDE = sys.version_info >= (3, 12)
+
+
+class ProfilerBusy(Exception):
+    """Raised when a capture is requested while another one is running"""
+
+
+class ProfileCapture:
+    """cProfile stats merged from every profiled() call that finished in the window"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = None
+        self.calls = 0
+
+    def add(self, profile):
+        with self.lock:
+            if self.stats is None:
+                self.stats = pstats.Stats(profile)
+            else:
+                self.stats.add(profile)
+            self.calls += 1
+
+    def to_pstats(self):
+        """Bytes in the format written by pstats.Stats.dump_stats()"""
+        with self.lock:
+            return marshal.dumps(self.stats.stats if self.stats else {})
+
+    def to_text(self, sort='cumulative', limit=50):
+        """pstats report of the top `limit` functions"""
+        if self.stats is None:
+            return "No profiled calls finished during the capture\n"
+        if sort not in pstats.Stats.sort_arg_dict_default:
+            sort = 'cumulative'
+        stream = io.StringIO()
+        with self.lock:
+            self.stats.stream = stream
+            self.stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+
+def start_call():
+    """Start profiling this thread if a capture is running; returns a token for finish_call()"""
+    capture = _active
+    if PROCESS_WIDE or capture is None or getattr(_local, 'profiling', False):
+        return None
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Another profiler (e.g. a debugger) already owns this thread
+        return None
+    _local.profiling = True
+    return capture, profile
+
+
+def finish_call(token):
+    if token is None:
+        return
+    capture, profile = token
+    profile.disable()
+    _local.profiling = False
+    if capture is _active:
+        capture.add(profile)
+
+
+@contextmanager
+def profiled():
+    """Profile the block while a capture is running"""
+    token = start_call()
+    try:
+        yield
+    finally:
+        finish_call(token)
+
+
+def profile_calls(func):
+    """Decorator form of profiled()"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with profiled():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def capture_profile(seconds):
+    """Collect cProfile stats from profiled() calls for `seconds` and return a ProfileCapture"""
+    global _active
+
+    if not _capture_lock.acquire(blocking=False):
+        raise ProfilerBusy()
+    try:
+        capture = ProfileCapture()
+        if PROCESS_WIDE:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                raise ProfilerBusy()
+            time.sleep(seconds)
+            profile.disable()
+            capture.add(profile)
+            return capture
+        _active = capture
+        time.sleep(seconds)
+        return capture
+    finally:
+        _active = None
+        _capture_lock.release()
+
+
+def _frame_name(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def sample_stacks(seconds, interval_ms=PROFILE_SAMPLE_INTERVAL_MS):
+    """Sample all other threads' stacks for `seconds`; returns (Counter of collapsed stacks, samples)"""
+    if not _capture_lock.acquire(blocking=False):
+        raise ProfilerBusy()
+    try:
+        counts = Counter()
+        samples = 0
+        own_thread = threading.get_ident()
+        interval = interval_ms / 1000
+        deadline = time.perf_counter() + seconds
+
+        while time.perf_counter() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                # The thread name is the root frame; ';' separates frames in the output
+                stack.append(names.get(thread_id, str(thread_id)).replace(';', '_'))
+                stack.reverse()
+                counts[';'.join(stack)] += 1
+            samples += 1
+            time.sleep(interval)
+
+        return counts, samples
+    finally:
+        _capture_lock.release()
+
+
+def collapsed(counts):
+    """Format sampled stacks one per line, most frequent first"""
+    return ''.join(f"{stack} {count}\n" for stack, count in counts.most_common())
@@ -0,0 +1,440 @@
+// Removed event listeners for page refresh (F5 or browser refresh button)
+
+// StorageManager for persisting card positions
+const StorageManager = {
+    STORAGE_KEY: 'stock_dashboard_order',
+    
+    // Check if localStorage is available
+    isAvailable: function() {
+        try {
+            const test = 'test';
+            localStorage.setItem(test, test);
+            localStorage.removeItem(test);
+            return true;
+        } catch (e) {
+            console.error('LocalStorage is not available:', e);
+            return false;
+        }
+    },
+    
+    // Get the saved order or create a new one
+    getOrder: function() {
+        if (!this.isAvailable()) return [];
+        
+        const savedOrder = localStorage.getItem(this.STORAGE_KEY);
+        return savedOrder ? JSON.parse(savedOrder) : [];
+    },
+    
+    // Save the current order to localStorage
+    saveOrder: function(order) {
+        if (!this.isAvailable()) return;
+        
+        localStorage.setItem(this.STORAGE_KEY, JSON.stringify(order));
+    },
+    
+    // Add a ticker to the beginning of the order
+    addTickerToOrder: function(ticker) {
+        if (!this.isAvailable()) return;
+        
+        const currentOrder = this.getOrder();
+        
+        // If ticker already exists, remove it first
+        const index = currentOrder.indexOf(ticker);
+        if (index !== -1) {
+            currentOrder.splice(index, 1);
+        }
+        
+        // Add to the beginning of the array
+        currentOrder.unshift(ticker);
+        this.saveOrder(currentOrder);
+    },
+    
+    // Remove a ticker from the order
+    removeTickerFromOrder: function(ticker) {
+        if (!this.isAvailable()) return;
+        
+        const currentOrder = this.getOrder();
+        const index = currentOrder.indexOf(ticker);
+        
+        if (index !== -1) {
+            currentOrder.splice(index, 1);
+            this.saveOrder(currentOrder);
+        }
+    }
+};
+
+// Function to capture current page state before reload
+window.addEventListener('beforeunload', function() {
+    // Capture current visible tickers and their order
+    if (StorageManager.isAvailable()) {
+        const currentVisibleOrder = Array.from(document.querySelectorAll('.card'))
+            .map(card => card.id.replace('card-', ''));
+        
+        if (currentVisibleOrder.length > 0) {
+            StorageManager.saveOrder(currentVisibleOrder);
+        }
+    }
+});
+
+// Function to arrange cards based on saved order
+function arrangeCardsBasedOnOrder() {
+    const container = document.getElementById('stocks-container');
+    const savedOrder = StorageManager.getOrder();
+    
+    // If we have a saved order, use it
+    if (savedOrder.length > 0) {
+        // Get current tickers on the page
+        const currentTickers = Array.from(document.querySelectorAll('.card'))
+            .map(card => card.id.replace('card-', ''));
+        
+        // Filter saved order to include only tickers currently on the page
+        const validOrderedTickers = savedOrder.filter(ticker => currentTickers.includes(ticker));
+        
+        // Add any tickers not in the saved order to the end
+        const tickersNotInOrder = currentTickers.filter(ticker => !validOrderedTickers.includes(ticker));
+        const finalOrder = [...validOrderedTickers, ...tickersNotInOrder];
+        
+        // Update the saved order with the final arrangement
+        StorageManager.saveOrder(finalOrder);
+        
+        // Reorder the DOM elements
+        finalOrder.forEach(ticker => {
+            const cardElement = document.getElementById(`card-${ticker}`);
+            if (cardElement) {
+                const colElement = cardElement.parentElement;
+                container.appendChild(colElement);
+            }
+        });
+    } else {
+        // No saved order, create initial order based on current cards
+        const initialOrder = Array.from(document.querySelectorAll('.card'))
+            .map(card => card.id.replace('card-', ''));
+        StorageManager.saveOrder(initialOrder);
+    }
+}
+
+// Call the arrange function when the page loads
+document.addEventListener('DOMContentLoaded', arrangeCardsBasedOnOrder);
+
+function updateClock() {
+    const now = new Date();
+    document.getElementById('current-time').textContent = now.toLocaleString();
+}
+
+function showToast(message, type = 'primary') {
+    const toastContainer = document.getElementById('toast-container');
+    const toastId = 'toast-' + Date.now();
+    const toast = document.createElement('div');
+    toast.className = 'toast show';
+    toast.setAttribute('role', 'alert');
+    toast.setAttribute('aria-live', 'assertive');
+    toast.setAttribute('aria-atomic', 'true');
+    toast.setAttribute('id', toastId);
+    
+    toast.innerHTML = `
+        <div class="toast-header bg-${type} text-white">
+            <strong class="me-auto">Stock Dashboard</strong>
+            <small>Just now</small>
+            <button type="button" class="btn-close btn-close-white" data-bs-dismiss="toast" aria-label="Close"></button>
+        </div>
+        <div class="toast-body bg-dark text-white">
+            ${message}
+        </div>
+    `;
+    
+    toastContainer.appendChild(toast);
+    
+    setTimeout(() => {
+        const toastEl = document.getElementById(toastId);
+        if (toastEl) {
+            toastEl.remove();
+        }
+    }, 3000);
+}
+
+// Add ticker form submission
+document.getElementById('add-ticker-form').addEventListener('submit', function(e) {
+    e.preventDefault();
+    
+    const tickerInput = document.getElementById('ticker-input');
+    const ticker = tickerInput.value.trim().toUpperCase();
+    const submitButton = document.querySelector('#add-ticker-form button[type="submit"]');
+    
+    if (!ticker) {
+        showToast('Please enter a ticker symbol', 'warning');
+        return;
+    }
+    
+    // Show loading state
+    submitButton.disabled = true;
+    submitButton.innerHTML = '<span class="spinner-border spinner-border-sm" role="status" aria-hidden="true"></span>';
+    showToast(`Checking ticker ${ticker}...`, 'info');
+    
+    // Send request to add ticker
+    const formData = new FormData();
+    formData.append('ticker', ticker);
+    
+    fetch('/api/add_ticker', {
+        method: 'POST',
+        body: formData
+    })
+    .then(response => response.json())
+    .then(data => {
+        // Reset button state
+        submitButton.disabled = false;
+        submitButton.innerHTML = '<i class="bi bi-plus"></i>';
+        
+        if (data.status === 'success') {
+            showToast(`Added ticker ${ticker}`, 'success');
+            
+            // Add ticker to saved order
+            StorageManager.addTickerToOrder(ticker);
+            
+            // Create and append the new stock card
+            const stocksContainer = document.getElementById('stocks-container');
+            const newTickerData = data.data;
+            
+            const colDiv = document.createElement('div');
+            colDiv.className = 'col-md-4';
+            
+            const cardPrice = newTickerData.price || 'N/A';
+            const cardChange = newTickerData.change || 'N/A';
+            const cardStatus = newTickerData.market_status || 'Unknown';
+            const cardLastUpdated = newTickerData.last_updated || 'Just now';
+            
+            let statusClass = 'market-closed';
+            if (cardStatus.includes('Pre-market')) statusClass = 'pre-market';
+            else if (cardStatus.includes('Market Open')) statusClass = 'market-open';
+            else if (cardStatus.includes('After Hours')) statusClass = 'after-hours';
+            else if (cardStatus.includes('Error')) statusClass = 'error';
+            
+            let priceClass = 'price-neutral';
+            if (cardChange.includes('-')) priceClass = 'price-down';
+            else if (cardChange.includes('+')) priceClass = 'price-up';
+            
+            colDiv.innerHTML = `
+                <div class="card" id="card-${ticker}">
+                    <div class="card-header d-flex justify-content-between align-items-center">
+                        <span class="ticker-symbol">${ticker}</span>
+                        <span class="badge rounded-pill ${statusClass} market-badge">
+                            ${cardStatus}
+                        </span>
+                        <button class="btn btn-danger btn-sm rounded-circle delete-ticker" 
+                                onclick="removeTicker('${ticker}')" 
+                                title="Remove ${ticker}">
+                            <i class="bi bi-x"></i>
+                        </button>
+                    </div>
+                    <div class="card-body">
+                        <h2 class="card-title ${priceClass}">
+                            ${cardPrice}
+                        </h2>
+                        <p class="card-text ${priceClass}">
+                            ${cardChange}
+                        </p>
+                        <p class="last-updated">Last updated: ${cardLastUpdated}</p>
+                    </div>
+                </div>
+            `;
+            
+            // Insert the new card at the top of the container
+            if (stocksContainer.firstChild) {
+                stocksContainer.insertBefore(colDiv, stocksContainer.firstChild);
+            } else {
+                stocksContainer.appendChild(colDiv);
+            }
+            
+            tickerInput.value = '';
+        } else {
+            showToast(data.message || 'Failed to add ticker', 'danger');
+        }
+    })
+    .catch(error => {
+        // Reset button state
+        submitButton.disabled = false;
+        submitButton.innerHTML = '<i class="bi bi-plus"></i>';
+        
+        console.error('Error:', error);
+        showToast('Failed to add ticker. Please try again.', 'danger');
+    });
+});
+
+// Function to remove a ticker
+function removeTicker(ticker) {
+    if (!confirm(`Are you sure you want to remove ${ticker}?`)) {
+        return;
+    }
+    
+    showToast(`Removing ticker ${ticker}...`, 'info');
+    
+    const formData = new FormData();
+    formData.append('ticker', ticker);
+    
+    fetch('/api/remove_ticker', {
+        method: 'POST',
+        body: formData
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.status === 'success') {
+            showToast(`Removed ticker ${ticker}`, 'success');
+            
+            // Remove ticker from saved order
+            StorageManager.removeTickerFromOrder(ticker);
+            
+            // Remove the ticker card from UI with animation
+            const cardElement = document.getElementById(`card-${ticker}`);
+            if (cardElement) {
+                const colElement = cardElement.parentElement;
+                colElement.style.transition = 'opacity 0.3s';
+                colElement.style.opacity = '0';
+                
+                setTimeout(() => {
+                    colElement.remove();
+                }, 300);
+            }
+        } else {
+            showToast(data.message || 'Failed to remove ticker', 'danger');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showToast('Failed to remove ticker. Please try again.', 'danger');
+    });
+}
+
+// Auto refresh every 5 seconds (silent, no toast notification)
+const AUTO_REFRESH_INTERVAL = 5 * 1000; // 5 seconds in milliseconds
+
+// Function to update a single stock card with new data
+function updateStockCard(ticker, data) {
+    const cardElement = document.getElementById(`card-${ticker}`);
+    if (!cardElement) return;
+    
+    // Update price
+    const priceElement = cardElement.querySelector('.card-title');
+    if (priceElement) {
+        priceElement.textContent = data.price;
+        
+        // Update price color
+        priceElement.className = 'card-title';
+        if (data.change.includes('-')) {
+            priceElement.classList.add('price-down');
+        } else if (data.change.includes('+')) {
+            priceElement.classList.add('price-up');
+        } else {
+            priceElement.classList.add('price-neutral');
+        }
+    }
+    
+    // Update change
+    const changeElement = cardElement.querySelector('.card-text');
+    if (changeElement) {
+        changeElement.textContent = data.change;
+        
+        // Update change color
+        changeElement.className = 'card-text';
+        if (data.change.includes('-')) {
+            changeElement.classList.add('price-down');
+        } else if (data.change.includes('+')) {
+            changeElement.classList.add('price-up');
+        } else {
+            changeElement.classList.add('price-neutral');
+        }
+    }
+    
+    // Update market status badge
+    const badgeElement = cardElement.querySelector('.badge');
+    if (badgeElement && data.market_status) {
+        badgeElement.textContent = data.market_status;
+        
+        // Update badge color
+        badgeElement.className = 'badge rounded-pill market-badge';
+        if (data.market_status.includes('Pre-market')) {
+            badgeElement.classList.add('pre-market');
+        } else if (data.market_status.includes('Market Open')) {
+            badgeElement.classList.add('market-open');
+        } else if (data.market_status.includes('After Hours')) {
+            badgeElement.classList.add('after-hours');
+        } else if (data.market_status.includes('Error')) {
+            badgeElement.classList.add('error');
+        } else {
+            badgeElement.classList.add('market-closed');
+        }
+    }
+    
+    // Update last updated time
+    const lastUpdatedElement = cardElement.querySelector('.last-updated');
+    if (lastUpdatedElement) {
+        lastUpdatedElement.textContent = `Last updated: ${data.last_updated}`;
+    }
+}
+
+// Rebuild {ticker: {price, change, ...}} from the parallel arrays of ?format=compact
+function unpackColumns(columns) {
+    const stockData = {};
+    const fields = Object.keys(columns).filter(field => field !== 'tickers');
+    columns.tickers.forEach((ticker, i) => {
+        const data = {};
+        fields.forEach(field => {
+            if (columns[field][i] !== null) {
+                data[field] = columns[field][i];
+            }
+        });
+        stockData[ticker] = data;
+    });
+    return stockData;
+}
+
+// Function to silently refresh data without page reload
+function silentRefresh() {
+    // The scheduler keeps quotes fresh and added tickers are written through
+    // on add, so read the shared cache instead of forcing a full /api/update
+    fetch('/api/stocks?format=compact')
+        .then(response => response.json())
+        .then(columns => {
+            const stockData = unpackColumns(columns);
+            
+            // Update each stock card with the new data
+            for (const [ticker, data] of Object.entries(stockData)) {
+                updateStockCard(ticker, data);
+            }
+            
+            // Handle any new tickers that might have been added by another session
+            const currentTickers = Array.from(document.querySelectorAll('.card'))
+                .map(card => card.id.replace('card-', ''));
+                
+            for (const ticker in stockData) {
+                if (!currentTickers.includes(ticker)) {
+                    // New ticker, reload the page to show it
+                    window.location.reload();
+                    return;
+                }
+            }
+            
+            // Check if any tickers were removed by another session
+            if (currentTickers.length !== Object.keys(stockData).length) {
+                // Ticker count mismatch, reload the page
+                window.location.reload();
+                return;
+            }
+        })
+        .catch(error => {
+            console.error('Error during silent refresh:', error);
+        });
+}
+
+// Schedule the next refresh
+const scheduleNextRefresh = () => {
+    window.refreshTimer = setTimeout(() => {
+        silentRefresh();
+        scheduleNextRefresh();
+    }, AUTO_REFRESH_INTERVAL);
+};
+
+// Start the refresh cycle
+scheduleNextRefresh();
+
+// Update clock every second
+setInterval(updateClock, 1000);
+updateClock();
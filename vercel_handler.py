@@ -1,75 +1,153 @@
-from flask import Flask, request
+import base64
+import io
 import json
-import os
+import sys
+import threading
+from urllib.parse import urlencode
 
 # Import your app
 from app import app as flask_app
 
-def handler(event, context):
-    """
-    Vercel serverless function handler for Flask
-    """
+# Content types that can be returned as plain text; everything else (and any
+# compressed body) is base64 encoded so bytes pass through untouched
+TEXT_CONTENT_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml')
+
+_init_lock = threading.Lock()
+
+
+def ensure_initialized():
+    """Initialize the database once per container instead of once per invocation"""
+    if getattr(flask_app, '_database_initialized', False):
+        return
+    with _init_lock:
+        if getattr(flask_app, '_database_initialized', False):
+            return
+        from app import initialize_database
+        with flask_app.app_context():
+            # Stays unset after a failure so the next invocation retries
+            flask_app._database_initialized = initialize_database()
+
+
+def _query_string(event):
+    """Rebuild the raw query string from the event"""
+    if event.get('rawQueryString') is not None:
+        return event['rawQueryString']
+    multi = event.get('multiValueQueryStringParameters')
+    if multi:
+        return urlencode([(key, value) for key, values in multi.items() for value in values])
+    params = event.get('queryStringParameters')
+    if params:
+        return urlencode(params)
+    return ''
+
+
+def _request_body(event):
+    """Return the request body as bytes, decoding base64 bodies"""
+    body = event.get('body') or b''
+    if isinstance(body, str):
+        if event.get('isBase64Encoded'):
+            return base64.b64decode(body)
+        return body.encode('utf-8')
+    return body
+
+
+def build_environ(event):
+    """Convert a Vercel/API Gateway style event into a WSGI environ"""
+    headers = {key.lower(): value for key, value in (event.get('headers') or {}).items()}
     path = event.get('path', '/')
-    http_method = event.get('httpMethod', 'GET')
-    headers = event.get('headers', {})
-    
-    # Convert Vercel's request format to WSGI format
+    query_string = _query_string(event)
+    if '?' in path:
+        path, query_string = path.split('?', 1)
+
+    body = _request_body(event)
+    forwarded_for = headers.get('x-forwarded-for', '')
+
     environ = {
-        'wsgi.input': None,  # No input stream for simplicity
-        'wsgi.errors': None,  # No error stream for simplicity
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
         'wsgi.version': (1, 0),
         'wsgi.multithread': False,
         'wsgi.multiprocess': False,
         'wsgi.run_once': False,
         'wsgi.url_scheme': headers.get('x-forwarded-proto', 'http'),
         'SERVER_SOFTWARE': 'Vercel',
-        'REQUEST_METHOD': http_method,
+        'REQUEST_METHOD': event.get('httpMethod', 'GET'),
+        'SCRIPT_NAME': '',
         'PATH_INFO': path,
-        'QUERY_STRING': event.get('queryStringParameters', {}),
+        'QUERY_STRING': query_string,
         'CONTENT_TYPE': headers.get('content-type', ''),
-        'CONTENT_LENGTH': headers.get('content-length', ''),
-        'REMOTE_ADDR': headers.get('x-forwarded-for', ''),
-        'SERVER_NAME': headers.get('host', 'localhost'),
+        'CONTENT_LENGTH': str(len(body)),
+        'REMOTE_ADDR': forwarded_for.split(',')[0].strip(),
+        'SERVER_NAME': headers.get('host', 'localhost').split(':')[0],
         'SERVER_PORT': headers.get('x-forwarded-port', '80'),
         'SERVER_PROTOCOL': 'HTTP/1.1',
     }
-    
+
     # Add HTTP headers
     for key, value in headers.items():
         key = key.upper().replace('-', '_')
         if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
             environ[f'HTTP_{key}'] = value
-    
-    # Execute the Flask application
+
+    return environ
+
+
+def _is_text(headers):
+    if 'Content-Encoding' in headers:
+        return False
+    content_type = headers.get('Content-Type', '')
+    return content_type.startswith(TEXT_CONTENT_TYPES)
+
+
+def handler(event, context):
+    """
+    Vercel serverless function handler for Flask
+    """
     response_data = {
         'statusCode': 200,
         'headers': {},
+        'multiValueHeaders': {},
         'body': '',
+        'isBase64Encoded': False,
     }
-    
+
     def start_response(status, response_headers, exc_info=None):
-        status_code = int(status.split(' ')[0])
-        response_data['statusCode'] = status_code
+        response_data['statusCode'] = int(status.split(' ')[0])
         for key, value in response_headers:
+            # Repeated headers (e.g. several Set-Cookie) must not overwrite each other
+            response_data['multiValueHeaders'].setdefault(key, []).append(value)
             response_data['headers'][key] = value
-    
+
     try:
-        # Initialize the database
-        from app import initialize_database, db
-        with flask_app.app_context():
-            initialize_database()
-        
-        # Execute the Flask application
-        body = b''.join(flask_app(environ, start_response))
-        response_data['body'] = body.decode('utf-8')
+        ensure_initialized()
+
+        # Execute the Flask application, writing chunks into one buffer as they arrive
+        body = io.BytesIO()
+        result = flask_app(build_environ(event), start_response)
+        try:
+            for chunk in result:
+                body.write(chunk)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+        payload = body.getvalue()
+        if _is_text(response_data['headers']):
+            response_data['body'] = payload.decode('utf-8')
+        else:
+            response_data['body'] = base64.b64encode(payload).decode('ascii')
+            response_data['isBase64Encoded'] = True
     except Exception as e:
         import traceback
         error_msg = str(e)
         traceback_str = traceback.format_exc()
         response_data['statusCode'] = 500
+        response_data['headers'] = {'Content-Type': 'application/json'}
+        response_data['multiValueHeaders'] = {}
+        response_data['isBase64Encoded'] = False
         response_data['body'] = json.dumps({
             'error': error_msg,
             'traceback': traceback_str
         })
-    
-    return response_data 
\ No newline at end of file
+
+    return response_data